@@ -1,12 +1,21 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from db.database_handler import init_database, shutdown_database
+from db.database_handler import (
+    AsyncDatabaseContextManager,
+    init_database,
+    shutdown_database,
+)
+from clients.page_fetcher import init_page_fetcher, shutdown_page_fetcher
 from routers import image_router
+from routers import metrics_router
 from routers import parser_router
 from routers import recipe_router
 from routers import user_router
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from services.extraction_jobs import init_extraction_jobs, shutdown_extraction_jobs
+from utils import load_config
 
 __version__ = "0.5.5"
 
@@ -14,8 +23,21 @@ __version__ = "0.5.5"
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     await init_database()
+    init_page_fetcher()
+    config = load_config()
+    async with AsyncDatabaseContextManager() as database:
+        await init_extraction_jobs(
+            database,
+            workers=config.get("extraction_workers", 2),
+            cache_ttl=config.get("extraction_cache_ttl", 30 * 24 * 60 * 60),
+            max_attempts=config.get("extraction_max_attempts", 3),
+        )
     yield
+    await shutdown_extraction_jobs()
+    await shutdown_page_fetcher()
     await shutdown_database()
+    await asyncio.to_thread(image_router.image_executor.shutdown)
+    await asyncio.to_thread(user_router.password_executor.shutdown)
 
 
 app = FastAPI(
@@ -30,12 +52,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[recipe_router.NEXT_CURSOR_HEADER],
 )
 
 app.include_router(recipe_router.recipe_router)
 app.include_router(image_router.image_router)
 app.include_router(user_router.user_router)
 app.include_router(parser_router.parser_router)
+app.include_router(metrics_router.metrics_router)
 
 if __name__ == "__main__":
     import uvicorn
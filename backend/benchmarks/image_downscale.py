@@ -0,0 +1,84 @@
+"""
+Compare latency and peak memory of processing an upload with a full decode
+against the header check and decoder-level reduction of `process_upload`.
+
+Every path runs in a fresh process, so that its peak RSS is not hidden by an
+earlier run. Needs Linux for /proc. Run from the backend directory:
+
+    python -m benchmarks.image_downscale
+"""
+
+import io
+import multiprocessing
+import statistics
+import time
+
+from PIL import Image as PILImage
+from services.image_tools import fit_size, process_image, process_upload
+
+RUNS = 5
+MAX_PIXELS = 64_000_000
+# Camera-like sizes: 12 MP and 48 MP.
+SAMPLES = (("jpeg", (4000, 3000)), ("jpeg", (8000, 6000)), ("png", (4000, 3000)))
+
+
+def full_decode(upload: bytes):
+    """The upload path before decoder-level reduction."""
+    image = PILImage.open(io.BytesIO(upload))
+    image = image.resize(fit_size(image.size))
+    return process_image(image)
+
+
+def reduced_decode(upload: bytes):
+    return process_upload(upload, MAX_PIXELS)
+
+
+PATHS = {"full decode": full_decode, "reduced decode": reduced_decode}
+
+
+def make_upload(format_: str, size: tuple[int, int]) -> bytes:
+    noise = PILImage.effect_noise(size, 40)
+    gradient = PILImage.linear_gradient("L").resize(size)
+    image = PILImage.merge("RGB", (gradient, noise, gradient.transpose(0)))
+    with io.BytesIO() as output:
+        image.save(output, format=format_, quality=90)
+        return output.getvalue()
+
+
+def _peak_rss() -> int:
+    # VmHWM starts over in a new process, unlike ru_maxrss, which a spawned
+    # process inherits from its parent on Linux.
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    raise RuntimeError("No VmHWM in /proc/self/status")
+
+
+def _measure(path: str, upload: bytes) -> tuple[float, float]:
+    # Runs in a fresh process; returns the median latency in seconds and the
+    # peak RSS of the process in MiB, which includes the interpreter and the
+    # received upload.
+    process = PATHS[path]
+    latencies = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        process(upload)
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies), _peak_rss() / 1024
+
+
+def main():
+    context = multiprocessing.get_context("spawn")
+    print(f"{'sample':>16} {'path':>15} {'median (ms)':>12} {'peak RSS (MiB)':>15}")
+    for format_, size in SAMPLES:
+        upload = make_upload(format_, size)
+        sample = f"{format_} {size[0]}x{size[1]}"
+        for path in PATHS:
+            with context.Pool(1) as pool:
+                latency, peak_rss = pool.apply(_measure, (path, upload))
+            print(f"{sample:>16} {path:>15} {latency * 1000:>12.1f} {peak_rss:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
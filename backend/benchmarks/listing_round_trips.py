@@ -0,0 +1,117 @@
+"""
+Count the database round trips of a recipe listing for growing page sizes.
+
+Runs `MySQLDatabase.get_all_recipes` against an in-memory stand-in for the
+aiomysql pool, so no MySQL server is needed. Run from the backend directory:
+
+    python -m benchmarks.listing_round_trips
+"""
+
+import asyncio
+import time
+
+from db.database import MySQLDatabase
+
+PAGE_SIZES = (1, 10, 100, 1000)
+
+
+class _Cursor:
+    def __init__(self, pool: "CountingPool"):
+        self.pool = pool
+        self.rows = []
+        self.rowcount = 0
+        self.lastrowid = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def execute(self, query, values=None):
+        self.pool.round_trips += 1
+        self.rows = self.pool.respond(query, values)
+        self.rowcount = len(self.rows)
+
+    async def executemany(self, query, values):
+        self.pool.round_trips += 1
+
+    async def fetchall(self):
+        return self.rows
+
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+class _Connection:
+    def __init__(self, pool: "CountingPool"):
+        self.pool = pool
+
+    def cursor(self):
+        return _Cursor(self.pool)
+
+    async def begin(self):
+        pass
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+class _Acquire:
+    def __init__(self, pool: "CountingPool"):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return _Connection(self.pool)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class CountingPool:
+    """A fake connection pool that serves synthetic recipes and counts queries."""
+
+    def __init__(self, recipe_count: int):
+        self.recipe_count = recipe_count
+        self.round_trips = 0
+
+    def acquire(self):
+        return _Acquire(self)
+
+    def respond(self, query: str, values) -> list[tuple]:
+        if query.startswith("SELECT r.RecipeID"):
+            return [
+                (id_, f"Rezept {id_}", "Lecker", None, 1, id_, 30, "koch", id_)
+                for id_ in range(1, self.recipe_count + 1)
+            ]
+        if query.startswith("SELECT RecipeID, Category"):
+            return [(id_, "Hauptgericht") for id_ in values]
+        if query.startswith("SELECT Category"):
+            return [("Hauptgericht",)]
+        if query.startswith("SELECT Username"):
+            return [("koch", "", False, False)]
+        return []
+
+
+async def measure(page_size: int) -> tuple[int, float]:
+    pool = CountingPool(page_size)
+    database = MySQLDatabase(pool)
+    start = time.perf_counter()
+    recipe_page = await database.get_all_recipes(limit=page_size)
+    elapsed = time.perf_counter() - start
+    assert len(recipe_page.recipes) == page_size
+    return pool.round_trips, elapsed
+
+
+async def main():
+    print(f"{'page size':>10} {'round trips':>12} {'time (ms)':>10}")
+    for page_size in PAGE_SIZES:
+        round_trips, elapsed = await measure(page_size)
+        print(f"{page_size:>10} {round_trips:>12} {elapsed * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Compare the latency of LLM calls to a single model with calls through the
+`ModelRouter`, which hedges slow calls and falls back on errors.
+
+Uses local fake chat models with a simulated latency tail and error rate, so
+no provider is called. Run from the backend directory:
+
+    python -m benchmarks.llm_hedging
+"""
+
+import asyncio
+import random
+import statistics
+import time
+
+from clients.llm_router import ModelRouter
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.runnables import Runnable, RunnableLambda
+from models.recipe import LLMRecipe
+
+CALLS = 400
+CONCURRENCY = 20
+RECIPE = LLMRecipe(
+    title="Tomatensuppe",
+    description="Eine einfache Suppe.",
+    portions=2,
+    ingredients=[{"name": "Tomaten", "unit": "g", "amount": 500}],
+    cooking_time=30,
+    steps=[{"order_id": 0, "step": "Tomaten kochen und pürieren."}],
+    categories=[],
+    is_a_recipe=True,
+).model_dump_json()
+
+
+def fake_model(latency: float, tail: float, tail_share: float, error_share: float):
+    """
+    A fake chat model that returns RECIPE after `latency` seconds, or after
+    `tail` seconds for a `tail_share` of the calls, and fails for an
+    `error_share` of them.
+    """
+
+    async def wait(messages):
+        if random.random() < error_share:
+            raise RuntimeError("Provider error")
+        await asyncio.sleep(tail if random.random() < tail_share else latency)
+        return messages
+
+    return (
+        RunnableLambda(wait)
+        | FakeListChatModel(responses=[RECIPE])
+        | PydanticOutputParser(pydantic_object=LLMRecipe)
+    )
+
+
+MODELS: dict[str, Runnable] = {
+    "primary": fake_model(latency=0.05, tail=1.0, tail_share=0.05, error_share=0.02),
+    "alternate": fake_model(latency=0.08, tail=0.4, tail_share=0.02, error_share=0.02),
+}
+
+
+async def _run(call) -> tuple[list[float], int]:
+    # Returns the latencies of the successful calls and the number of errors.
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call()
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(CALLS)))
+    return latencies, errors
+
+
+async def main():
+    def invoke(model: str):
+        return MODELS[model].ainvoke([{"role": "user", "content": "Rezept"}])
+
+    router = ModelRouter(list(MODELS), timeout=2, hedge_delay=0.2, min_samples=20)
+    runs = {
+        "primary only": lambda: invoke("primary"),
+        "router": lambda: router.call(invoke),
+    }
+    print(f"{'path':>13} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}")
+    for path, call in runs.items():
+        latencies, errors = await _run(call)
+        p50, p95, p99 = (
+            statistics.quantiles(latencies, n=100)[p - 1] * 1000 for p in (50, 95, 99)
+        )
+        print(f"{path:>13} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f} {errors:>7}")
+    print(
+        f"hedged calls: {router.hedges.value()}, "
+        f"fallback calls: {router.fallbacks.value()}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
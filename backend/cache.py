@@ -0,0 +1,85 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+import metrics
+
+
+class LRUCache:
+    """
+    An in-process cache bounded by entry count and optionally by total weight,
+    evicting the least recently used entries. Entries expire after a TTL.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl: float,
+        max_weight: int | None = None,
+        weigher: Callable[[object], int] | None = None,
+    ):
+        """
+        :param name: Prefix of the cache's metrics.
+        :param max_entries: The maximum number of entries.
+        :param ttl: Seconds after which an entry expires.
+        :param max_weight: The maximum total weight of all entries.
+        :param weigher: Computes the weight of a value, e.g. its size in bytes.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self._weigher = weigher or (lambda _: 1)
+        self._entries: OrderedDict[Hashable, tuple[float, int, object]] = OrderedDict()
+        self._weight = 0
+
+        self.hits = metrics.Counter(f"{name}_cache_hits_total", "Cache hits")
+        self.misses = metrics.Counter(f"{name}_cache_misses_total", "Cache misses")
+        metrics.Gauge(
+            f"{name}_cache_entries", "Entries in the cache", lambda: len(self)
+        )
+        metrics.Gauge(
+            f"{name}_cache_weight",
+            "Total weight of the cached entries",
+            lambda: self._weight,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        """Get a cached value, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self.invalidate(key)
+            self.misses.inc()
+            return None
+        self._entries.move_to_end(key)
+        self.hits.inc()
+        return entry[2]
+
+    def put(self, key: Hashable, value):
+        """Cache a value, evicting the least recently used entries if needed."""
+        weight = self._weigher(value)
+        if self.max_weight is not None and weight > self.max_weight:
+            return
+        self.invalidate(key)
+        self._entries[key] = (time.monotonic() + self.ttl, weight, value)
+        self._weight += weight
+        while len(self._entries) > self.max_entries or (
+            self.max_weight is not None and self._weight > self.max_weight
+        ):
+            _, (_, evicted_weight, _) = self._entries.popitem(last=False)
+            self._weight -= evicted_weight
+
+    def invalidate(self, key: Hashable):
+        """Remove a value from the cache."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._weight -= entry[1]
+
+    def clear(self):
+        """Remove all values from the cache."""
+        self._entries.clear()
+        self._weight = 0
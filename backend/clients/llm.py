@@ -1,13 +1,25 @@
 from utils import load_config
+import asyncio
+import contextlib
 import logging
 import os
+import time
+from typing import Callable
 
+import metrics
+from clients.llm_router import ModelRouter
 from models.recipe import LLMRecipe
 from utils import load_credentials
 from langchain.chat_models import init_chat_model
 from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.runnables import Runnable
 
-MODEL = load_config()["extraction_llm"]
+CONFIG = load_config()
+MODEL = CONFIG["extraction_llm"]
+# Models that get hedged calls and failed calls of MODEL, in order of preference.
+FALLBACK_MODELS = CONFIG.get("extraction_fallback_llms", [])
 os.environ["OPENAI_API_KEY"] = load_credentials()["openai_key"]
 os.environ["GEMINI_API_KEY"] = load_credentials()["gemini_key"]
 
@@ -28,6 +40,39 @@ USER_TEXT_PROMPT = """You are a recipe extractor.
                 IF THE DATA IS NOT A RECIPE FOR A MEAL OR DRINK RETURN NOTHING!!!"""
 
 
+# At most this many LLM calls run at the same time, the others wait for a slot.
+MAX_CONCURRENT_CALLS = CONFIG.get("llm_max_concurrent_calls", 4)
+# Token bucket for the LLM calls, per model: a burst of up to LLM_BURST calls,
+# refilled at LLM_REQUESTS_PER_SECOND.
+LLM_REQUESTS_PER_SECOND = CONFIG.get("llm_requests_per_second", 1)
+LLM_BURST = CONFIG.get("llm_burst", 5)
+# Seconds after which a call to a model counts as failed, and the latency
+# percentile of a model after which a call is also sent to the next model.
+LLM_TIMEOUT = CONFIG.get("llm_timeout", 120)
+LLM_HEDGE_PERCENTILE = CONFIG.get("llm_hedge_percentile", 95)
+
+_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+_chat_models: dict[str, BaseChatModel] = {}
+_models: dict[tuple[str, bool], Runnable] = {}
+_router = ModelRouter(
+    [MODEL, *FALLBACK_MODELS],
+    timeout=LLM_TIMEOUT,
+    hedge_percentile=LLM_HEDGE_PERCENTILE,
+)
+
+CALLS_IN_FLIGHT = metrics.Gauge("llm_calls_in_flight", "LLM calls that are running")
+CALL_WAIT = metrics.Summary(
+    "llm_call_wait_seconds", "Time LLM calls waited for a concurrency slot"
+)
+CALL_DURATION = metrics.Summary(
+    "llm_call_duration_seconds", "Time LLM calls took, including rate limiting"
+)
+INPUT_TOKENS = metrics.Counter("llm_input_tokens_total", "Tokens sent to the LLM")
+OUTPUT_TOKENS = metrics.Counter(
+    "llm_output_tokens_total", "Tokens generated by the LLM"
+)
+
+
 def get_model_provider(model: str) -> str:
     if model.startswith("gpt"):
         return "openai"
@@ -37,31 +82,133 @@ def get_model_provider(model: str) -> str:
         raise ValueError(f"Unknown model provider: {model}")
 
 
-def call_llm(system_prompt: str, recipe_data: str) -> LLMRecipe:
+def _chat_model(model: str) -> BaseChatModel:
+    if model not in _chat_models:
+        _chat_models[model] = init_chat_model(
+            model,
+            model_provider=get_model_provider(model),
+            rate_limiter=InMemoryRateLimiter(
+                requests_per_second=LLM_REQUESTS_PER_SECOND,
+                max_bucket_size=LLM_BURST,
+            ),
+        )
+    return _chat_models[model]
+
+
+def get_model(model: str = MODEL, streaming: bool = False) -> Runnable:
+    """
+    Get the long-lived client of a model that returns LLMRecipe objects. The
+    client and its HTTP connections are reused for every call to the model.
+    :param streaming: Get a client that streams the recipe as growing dicts
+        instead, which only a complete stream turns into an LLMRecipe.
     """
-    Calls the configured LLM with the given system_prompt and recipe_data.
+    if (model, streaming) not in _models:
+        schema = LLMRecipe.model_json_schema() if streaming else LLMRecipe
+        _models[model, streaming] = _chat_model(model).with_structured_output(schema)
+    return _models[model, streaming]
+
+
+def _messages(system_prompt: str, recipe_data: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": system_prompt,
+        },
+        {
+            "role": "user",
+            "content": recipe_data,
+        },
+    ]
+
+
+def _record_usage(usage_callback: UsageMetadataCallbackHandler):
+    for usage in usage_callback.usage_metadata.values():
+        INPUT_TOKENS.inc(usage.get("input_tokens", 0))
+        OUTPUT_TOKENS.inc(usage.get("output_tokens", 0))
+    logging.info(f"Token Usage: {usage_callback.usage_metadata}")
+
+
+async def _astream(
+    model: str, messages: list[dict], config: dict, on_partial: Callable[[dict], None]
+) -> LLMRecipe:
+    recipe = None
+    async for recipe in get_model(model, streaming=True).astream(
+        messages, config=config
+    ):
+        on_partial(recipe)
+    return LLMRecipe.model_validate(recipe)
+
+
+async def acall_llm(
+    system_prompt: str,
+    recipe_data: str,
+    on_partial: Callable[[dict], None] | None = None,
+    router: ModelRouter = _router,
+) -> LLMRecipe:
+    """
+    Calls the configured LLMs with the given system_prompt and recipe_data
+    without blocking the event loop. Calls beyond the concurrency limit or the
+    rate limit wait for their turn instead of being sent to the provider.
+    Slow calls are hedged and failed calls retried on the fallback models.
     :param system_prompt: The system_prompt to use.
     :param recipe_data: The recipe data to pass to the LLM.
+    :param on_partial: Called with the recipe extracted so far, as a dict,
+        while the response is streamed.
+    :param router: Chooses the models to call.
     :return: A recipe object containing the extracted information.
     """
-    model = init_chat_model(MODEL, model_provider=get_model_provider(MODEL))
     usage_callback = UsageMetadataCallbackHandler()
-    response = model.with_structured_output(LLMRecipe).invoke(
-        [
-            {
-                "role": "system",
-                "content": system_prompt,
-            },
-            {
-                "role": "user",
-                "content": recipe_data,
-            },
-        ],
-        config={
-            "configurable": {"model": MODEL},
-            "callbacks": [usage_callback],
-        },
-    )
+    messages = _messages(system_prompt, recipe_data)
+    config = {"callbacks": [usage_callback]}
+    streaming_model = None
+    calls_running = 0
 
-    logging.info(f"Token Usage: {usage_callback.usage_metadata}")
+    def forward(model: str, recipe: dict):
+        # Hedged calls stream at the same time, only one of them is reported.
+        nonlocal streaming_model
+        streaming_model = streaming_model or model
+        if streaming_model == model:
+            on_partial(recipe)
+
+    async def attempt(model: str) -> LLMRecipe:
+        nonlocal streaming_model
+        if on_partial is None:
+            return await get_model(model).ainvoke(messages, config=config)
+        try:
+            return await _astream(
+                model, messages, config, lambda recipe: forward(model, recipe)
+            )
+        except BaseException:
+            # Also on cancellation, e.g. when the call timed out.
+            if streaming_model == model:
+                streaming_model = None
+            raise
+
+    async def call(model: str) -> LLMRecipe:
+        nonlocal calls_running
+        # The first call runs in the slot taken below, a hedged call that runs
+        # next to it takes a slot of its own.
+        slot = _semaphore if calls_running else contextlib.nullcontext()
+        calls_running += 1
+        try:
+            async with slot:
+                return await attempt(model)
+        finally:
+            calls_running -= 1
+
+    queued = time.perf_counter()
+    async with _semaphore:
+        start = time.perf_counter()
+        CALL_WAIT.observe(start - queued)
+        CALLS_IN_FLIGHT.inc()
+        try:
+            # Only hedge if a slot is free right away.
+            response = await router.call(
+                call, can_hedge=lambda: not _semaphore.locked()
+            )
+        finally:
+            CALLS_IN_FLIGHT.dec()
+            CALL_DURATION.observe(time.perf_counter() - start)
+
+    _record_usage(usage_callback)
     return response
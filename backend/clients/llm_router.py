@@ -0,0 +1,171 @@
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+import metrics
+
+T = TypeVar("T")
+
+# Outcomes per model that the error rate is computed from.
+OUTCOME_WINDOW = 50
+
+
+class ModelStats:
+    """Latency and errors of the recent calls to one model."""
+
+    def __init__(self, model: str):
+        name = re.sub(r"\W", "_", model)
+        self.latency = metrics.Summary(
+            f"llm_{name}_latency_seconds", f"Time successful calls to {model} took"
+        )
+        self.errors = metrics.Counter(
+            f"llm_{name}_errors_total", f"Calls to {model} that failed or timed out"
+        )
+        self._outcomes: deque[bool] = deque(maxlen=OUTCOME_WINDOW)
+
+    def success(self, latency: float):
+        self.latency.observe(latency)
+        self._outcomes.append(True)
+
+    def failure(self):
+        self.errors.inc()
+        self._outcomes.append(False)
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+
+class ModelRouter:
+    """
+    Sends each call to the first of a list of models and, if it fails or times
+    out, to the next one. A call that takes longer than the usual latency of
+    its model is hedged: the next model gets the same call, the first answer
+    is used and the other call is cancelled. Models with many recent errors
+    are tried last.
+
+    The router only knows model names, the call itself is a function of the
+    name, so any client (or a fake one) can be routed.
+    """
+
+    def __init__(
+        self,
+        models: list[str],
+        timeout: float,
+        hedge_percentile: float = 95,
+        hedge_delay: float = 20,
+        min_samples: int = 20,
+        max_error_rate: float = 0.5,
+    ):
+        """
+        :param models: The model names, in order of preference.
+        :param timeout: Seconds after which a call to a model counts as failed.
+        :param hedge_percentile: The latency percentile of a model after which
+            a call to it is hedged.
+        :param hedge_delay: Seconds after which a call is hedged while a model
+            has fewer than min_samples latencies.
+        :param max_error_rate: Models with a higher share of failed recent
+            calls are tried after the others.
+        """
+        self.models = models
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.stats = {model: ModelStats(model) for model in models}
+        self.hedges = metrics.Counter(
+            "llm_hedged_calls_total", "LLM calls that were sent to a second model"
+        )
+        self.fallbacks = metrics.Counter(
+            "llm_fallback_calls_total", "LLM calls retried with another model"
+        )
+
+    def _order(self) -> list[str]:
+        # Sorting is stable, so the preference holds among healthy models.
+        return sorted(
+            self.models,
+            key=lambda model: self.stats[model].error_rate() > self.max_error_rate,
+        )
+
+    def _hedge_after(self, model: str) -> float:
+        latency = self.stats[model].latency
+        if latency.count < self.min_samples:
+            return self.hedge_delay
+        return latency.percentile(self.hedge_percentile)
+
+    async def _attempt(self, model: str, call: Callable[[str], Awaitable[T]]) -> T:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(call(model), self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.stats[model].failure()
+            raise
+        self.stats[model].success(time.perf_counter() - start)
+        return result
+
+    async def call(
+        self,
+        call: Callable[[str], Awaitable[T]],
+        can_hedge: Callable[[], bool] | None = None,
+    ) -> T:
+        """
+        Run a call on the best model, hedged and with fallbacks.
+        :param can_hedge: Whether there is capacity for a hedged call right
+            now. If not, the call is not hedged and waits for its first model.
+
+        Raises:
+            Exception: The error of the last model, if all of them failed.
+        """
+        models = iter(self._order())
+        latest = next(models)
+        running = {asyncio.create_task(self._attempt(latest, call)): latest}
+        hedged = False
+        error = None
+        try:
+            while running:
+                next_model = next(models, None)
+                hedge_after = None
+                if next_model is not None and not hedged:
+                    hedge_after = self._hedge_after(latest)
+                done, _ = await asyncio.wait(
+                    running, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    if can_hedge is not None and not can_hedge():
+                        # Keep the model as the fallback of the running call.
+                        models = iter([next_model, *models])
+                        continue
+                    # Slower than usual: ask the next model as well.
+                    self.hedges.inc()
+                    running[asyncio.create_task(self._attempt(next_model, call))] = (
+                        next_model
+                    )
+                    continue
+
+                for task in done:
+                    del running[task]
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if next_model is None:
+                    continue
+                if running:
+                    # Another call is still running, keep the model for later.
+                    models = iter([next_model, *models])
+                else:
+                    self.fallbacks.inc()
+                    latest = next_model
+                    running[asyncio.create_task(self._attempt(next_model, call))] = (
+                        next_model
+                    )
+            raise error
+        finally:
+            for task in running:
+                task.cancel()
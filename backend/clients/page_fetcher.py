@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+import metrics
+from utils import load_config
+
+CONFIG = load_config()
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/122.0.0.0 Safari/537.36"
+)
+# Seconds to connect to a recipe site, and to wait for each read of a page.
+CONNECT_TIMEOUT = CONFIG.get("fetch_connect_timeout", 5)
+READ_TIMEOUT = CONFIG.get("fetch_timeout", 15)
+# Pages larger than this are cut off and rejected instead of read into memory.
+MAX_PAGE_BYTES = CONFIG.get("fetch_max_page_bytes", 5 * 1024 * 1024)
+# Open connections over all sites, and requests to one site at the same time.
+MAX_CONNECTIONS = CONFIG.get("fetch_max_connections", 20)
+MAX_CONNECTIONS_PER_HOST = CONFIG.get("fetch_max_connections_per_host", 2)
+
+FETCH_DURATION = metrics.Summary(
+    "page_fetch_duration_seconds", "Time it takes to fetch a recipe page"
+)
+PAGE_SIZE = metrics.Summary("page_fetch_bytes", "Size of fetched recipe pages")
+FAILED_FETCHES = metrics.Counter(
+    "page_fetches_failed_total", "Recipe pages that could not be fetched"
+)
+
+
+class PageFetcher:
+    """
+    Fetches recipe pages through one pooled HTTP client, so that connections
+    to a site are reused, and limits the concurrent requests per site.
+    """
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+            ),
+            follow_redirects=True,
+        )
+        # The semaphores of the sites that are being fetched from, and the
+        # number of requests that hold or wait for them.
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self._host_requests: Counter[str] = Counter()
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def fetch(self, url: str) -> str:
+        """
+        Fetch the text of a page.
+
+        Raises:
+            ValueError: If the URL is invalid, or the page could not be fetched
+                or is larger than MAX_PAGE_BYTES.
+        """
+        host = urlsplit(url).hostname
+        if urlsplit(url).scheme not in ("http", "https") or not host:
+            raise ValueError(f"{url} is not a valid recipe URL.")
+
+        async with self._host_slot(host):
+            start = time.perf_counter()
+            try:
+                return await self._read(url)
+            except httpx.TimeoutException as e:
+                FAILED_FETCHES.inc()
+                raise ValueError(f"{url} did not respond in time.") from e
+            except httpx.HTTPError as e:
+                FAILED_FETCHES.inc()
+                raise ValueError(f"Failed to fetch recipe data from {url}.") from e
+            except ValueError:
+                FAILED_FETCHES.inc()
+                raise
+            finally:
+                FETCH_DURATION.observe(time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str):
+        # The semaphore of a site is dropped once no request uses it, so that
+        # the sites of past requests are not kept forever.
+        semaphore = self._hosts.setdefault(
+            host, asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+        )
+        self._host_requests[host] += 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            self._host_requests[host] -= 1
+            if not self._host_requests[host]:
+                del self._host_requests[host]
+                del self._hosts[host]
+
+    async def _read(self, url: str) -> str:
+        async with self.client.stream("GET", url) as response:
+            if response.status_code != 200:
+                raise ValueError(
+                    f"Failed to fetch recipe data from the URL. "
+                    f"{url} returned HTTP {response.status_code}"
+                )
+            if int(response.headers.get("Content-Length", 0)) > MAX_PAGE_BYTES:
+                raise ValueError(f"The page at {url} is too large.")
+
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > MAX_PAGE_BYTES:
+                    raise ValueError(f"The page at {url} is too large.")
+        PAGE_SIZE.observe(len(body))
+        return body.decode(response.encoding or "utf-8", errors="replace")
+
+
+_fetcher: PageFetcher | None = None
+
+
+def init_page_fetcher() -> None:
+    """Create the shared page fetcher (call once at app startup)."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = PageFetcher()
+
+
+async def shutdown_page_fetcher() -> None:
+    """Close the connections of the shared page fetcher (call once at app shutdown)."""
+    global _fetcher
+    if _fetcher is not None:
+        await _fetcher.close()
+        _fetcher = None
+
+
+def get_page_fetcher() -> PageFetcher:
+    if _fetcher is None:
+        raise RuntimeError("Page fetcher is not initialized")
+    return _fetcher
@@ -0,0 +1,28 @@
+"""
+Fill the recipe search index for all existing recipes. Run from the backend
+directory after applying db/migrations/001_search_terms.sql:
+
+    python -m db.build_search_index
+"""
+
+import asyncio
+
+from db.database_handler import (
+    AsyncDatabaseContextManager,
+    init_database,
+    shutdown_database,
+)
+
+
+async def main():
+    await init_database()
+    try:
+        async with AsyncDatabaseContextManager() as database:
+            count = await database.build_search_index()
+        print(f"Indexed {count} recipes.")
+    finally:
+        await shutdown_database()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+import weakref
+from collections import Counter
+from collections.abc import Awaitable, Callable
+
+import metrics
+
+_buffers: "weakref.WeakSet[ClickBuffer]" = weakref.WeakSet()
+
+BUFFERED_CLICKS = metrics.Gauge(
+    "clicks_buffered",
+    "Clicks counted in memory that are not written yet",
+    lambda: sum(buffer.buffered_clicks() for buffer in _buffers),
+)
+FLUSH_LAG = metrics.Gauge(
+    "click_flush_lag_seconds",
+    "Age of the oldest click that is not written yet",
+    lambda: max((buffer.flush_lag() for buffer in _buffers), default=0.0),
+)
+FLUSH_DURATION = metrics.Summary(
+    "click_flush_duration_seconds", "Time it takes to write buffered clicks"
+)
+FLUSHED_CLICKS = metrics.Counter(
+    "clicks_flushed_total", "Clicks written to the database"
+)
+FLUSH_FAILURES = metrics.Counter(
+    "click_flush_failures_total", "Click flushes that failed and were retried"
+)
+
+
+class ClickBuffer:
+    """
+    Counts recipe views in memory and writes them to the database periodically
+    as one batched update instead of one update per view.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[dict[int, int]], Awaitable[None]],
+        flush_interval: float,
+    ):
+        """
+        :param write: Adds the given clicks per recipe ID to the database.
+        :param flush_interval: Seconds between two flushes.
+        """
+        self._write = write
+        self._flush_interval = flush_interval
+        self._clicks = Counter()
+        self._recorded = Counter()
+        self._oldest_click: float | None = None
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        _buffers.add(self)
+
+    def record(self, recipe_id: int):
+        """Count a view of a recipe."""
+        if self._oldest_click is None:
+            self._oldest_click = time.monotonic()
+        self._clicks[recipe_id] += 1
+        self._recorded[recipe_id] += 1
+
+    def recorded(self, recipe_id: int) -> int:
+        """Get the number of views of a recipe counted since startup."""
+        return self._recorded[recipe_id]
+
+    def pending(self, recipe_id: int) -> int:
+        """Get the number of views of a recipe that are not written yet."""
+        return self._clicks[recipe_id]
+
+    def buffered_clicks(self) -> int:
+        """Get the number of clicks that are not written yet."""
+        return self._clicks.total()
+
+    def flush_lag(self) -> float:
+        """Get the age in seconds of the oldest click that is not written yet."""
+        if self._oldest_click is None:
+            return 0.0
+        return time.monotonic() - self._oldest_click
+
+    async def flush(self):
+        """Write all buffered clicks. Failed writes are kept for the next flush."""
+        async with self._lock:
+            if not self._clicks:
+                return
+            clicks, oldest_click = self._clicks, self._oldest_click
+            self._clicks, self._oldest_click = Counter(), None
+
+            start = time.perf_counter()
+            try:
+                await self._write(dict(clicks))
+            except Exception:
+                logging.exception("Failed to write %s clicks", clicks.total())
+                FLUSH_FAILURES.inc()
+                self._clicks.update(clicks)
+                self._oldest_click = oldest_click
+                return
+            FLUSH_DURATION.observe(time.perf_counter() - start)
+            FLUSHED_CLICKS.inc(clicks.total())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Start flushing in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Stop the background flushing and write the remaining clicks."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -1,21 +1,39 @@
 import asyncio
+import base64
+import json
+import math
 from abc import ABC, abstractmethod
+from collections.abc import Collection
+from contextlib import asynccontextmanager
+from decimal import Decimal
 from enum import StrEnum
 
 import aiomysql
-from exceptions import NotFoundException
+from cache import LRUCache
+from db.click_buffer import ClickBuffer
+from db.image_store import FileImageStore, ImageStore
+from exceptions import InvalidCursorException, NotFoundException, OverloadedException
+from models.extraction import (
+    ExtractionJob,
+    ExtractionKindEnum,
+    ExtractionStatusEnum,
+    ExtractionTask,
+)
 from models.recipe import (
     CategoryEnum,
     Ingredient,
+    LLMRecipe,
     Recipe,
     RecipeBase,
     RecipeListing,
+    RecipeListingPage,
     RecipeStep,
     UnitEnum,
 )
 from models.user import UserInDB
 from pydantic import ValidationError
-from utils import load_config, load_credentials, run_background_task
+from services.search import build_terms, query_terms
+from utils import load_config, load_credentials
 
 
 class SortByEnum(StrEnum):
@@ -25,6 +43,7 @@ class SortByEnum(StrEnum):
     TITLE = "Title"
     ID = "RecipeID"
     COOKING_TIME = "CookingTime"
+    RELEVANCE = "Relevance"
 
 
 class SortOrderEnum(StrEnum):
@@ -34,6 +53,70 @@ class SortOrderEnum(StrEnum):
     DESC = "DESC"
 
 
+# Sort keys are indexed columns that are never NULL (see migration 009), so
+# keyset conditions on them are index range scans.
+SORT_KEYS = {
+    SortByEnum.CLICKS: "r.SortClicks",
+    SortByEnum.TITLE: "r.SortTitle",
+    SortByEnum.ID: "r.RecipeID",
+    SortByEnum.COOKING_TIME: "r.SortCookingTime",
+}
+
+
+def encode_cursor(
+    sort_by: SortByEnum, sort_order: SortOrderEnum, sort_key, recipe_id: int
+) -> str:
+    """Encode the position after a listed recipe as an opaque cursor."""
+    if isinstance(sort_key, Decimal):
+        sort_key = int(sort_key)
+    payload = json.dumps([sort_by, sort_order, sort_key, recipe_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, sort_by: SortByEnum, sort_order: SortOrderEnum
+) -> tuple[int | float | str, int]:
+    """
+    Decode a cursor created by encode_cursor.
+
+    Raises:
+        InvalidCursorException if the cursor is malformed or belongs to a
+        different sorting.
+
+    Returns:
+        The sort key and ID of the last recipe of the previous page.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort_by, cursor_sort_order, sort_key, recipe_id = json.loads(payload)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorException("The cursor is malformed.") from e
+    if not isinstance(sort_key, int | float | str) or not isinstance(recipe_id, int):
+        raise InvalidCursorException("The cursor is malformed.")
+    if cursor_sort_by != sort_by or cursor_sort_order != sort_order:
+        raise InvalidCursorException("The cursor belongs to a different sorting.")
+    return sort_key, recipe_id
+
+
+# Images uploaded before the MIME type was stored were all converted to WebP.
+DEFAULT_IMAGE_MIME_TYPE = "image/webp"
+# Seconds to wait for the lock of an image file.
+STORAGE_LOCK_TIMEOUT = 10
+
+RECIPE_STEPS_QUERY = "SELECT s.StepID, s.OrderID, s.Step, i.ImageID FROM RecipeSteps s LEFT JOIN Images i ON i.StepID = s.StepID WHERE s.RecipeID = %s ORDER BY s.StepID, i.ImageID"
+
+
+def _group_recipe_steps(rows) -> dict[int, RecipeStep]:
+    """Group the rows of RECIPE_STEPS_QUERY into steps keyed by their StepID."""
+    steps = {}
+    for step_id, order_id, step, image_id in rows:
+        if step_id not in steps:
+            steps[step_id] = RecipeStep(order_id=order_id, step=step, images=[])
+        if image_id is not None:
+            steps[step_id].images.append(image_id)
+    return steps
+
+
 class Database(ABC):
     """A MySQL database class."""
 
@@ -68,12 +151,20 @@ class Database(ABC):
         filter_categories: list[CategoryEnum] | None = None,
         sort_by: SortByEnum = SortByEnum.CLICKS,
         sort_order: SortOrderEnum = SortOrderEnum.DESC,
-    ) -> list[RecipeListing]:
+        cursor: str | None = None,
+    ) -> RecipeListingPage:
         """
         Get all recipes that respect the given filters from the database.
 
+        A cursor from a previous page continues after that page's last
+        recipe and takes precedence over the page number.
+
+        Raises:
+            InvalidCursorException if the cursor is malformed or was issued
+            for a different sorting.
+
         Returns:
-            A list of recipes.
+            A page of recipes with the cursor of the next page.
         """
 
     @abstractmethod
@@ -99,31 +190,49 @@ class Database(ABC):
         """Check if the user is authorized to access the recipe."""
 
     @abstractmethod
-    async def create_image(self, image: bytes) -> int:
+    async def create_image(
+        self, image: bytes, mime_type: str, variants: dict[int, bytes] | None = None
+    ) -> int:
         """
-        Create a new image in the database.
+        Create a new image, with smaller variants of it by size, in the database.
+        Every upload gets an image of its own, identical uploads only share the
+        stored files.
 
         Returns:
             The ID of the new image.
         """
 
     @abstractmethod
-    async def get_image(self, image_id: int) -> bytes:
+    async def get_image(
+        self, image_id: int, width: int | None = None
+    ) -> tuple[str, str]:
         """
-        Get an image from the database.
+        Get an image from the database. If a width is given, get the smallest
+        variant of the image that is at least as wide.
 
         Raises:
             NotFoundException if the image could not be found.
-            ValidationError if the image could not be validated.
 
         Returns:
-            The image object.
+            The path of the image file and its MIME type.
+        """
+
+    @abstractmethod
+    async def get_image_mime_type(self, image_id: int) -> str:
+        """
+        Get the MIME type of an image without loading the image data.
+
+        Raises:
+            NotFoundException if the image could not be found.
+
+        Returns:
+            The MIME type of the image.
         """
 
     @abstractmethod
     async def delete_image(self, image_id: int):
         """
-        Delete an image from the database.
+        Delete an image from the database, unless a recipe still uses it.
 
         Raises:
             NotFoundException if the image could not be found.
@@ -173,6 +282,86 @@ class Database(ABC):
             The user object.
         """
 
+    @abstractmethod
+    def invalidate_user(self, user_id: int):
+        """
+        Drop a user from the user cache. Call it after every change of a user,
+        such as disabling it, so that the change takes effect right away.
+        """
+
+    @abstractmethod
+    async def create_extraction_job(
+        self,
+        user_id: int,
+        kind: ExtractionKindEnum,
+        source: str,
+        use_cache: bool = True,
+    ) -> int:
+        """
+        Create a pending recipe extraction job in the database.
+
+        Returns:
+            The ID of the new job.
+        """
+
+    @abstractmethod
+    async def get_extraction_job(self, job_id: int) -> ExtractionJob:
+        """
+        Get a recipe extraction job from the database.
+
+        Raises:
+            NotFoundException if the job could not be found.
+
+        Returns:
+            The job object.
+        """
+
+    @abstractmethod
+    async def claim_extraction_job(self, job_id: int) -> ExtractionTask | None:
+        """
+        Mark a pending recipe extraction job as running and count the attempt.
+
+        Returns:
+            The input of the job, or None if the job is not pending.
+        """
+
+    @abstractmethod
+    async def finish_extraction_job(
+        self,
+        job_id: int,
+        recipe_id: int | None = None,
+        error: str | None = None,
+    ):
+        """Mark a running recipe extraction job as done, or as failed on error."""
+
+    @abstractmethod
+    async def get_unfinished_extraction_jobs(self, max_attempts: int) -> list[int]:
+        """
+        Mark running recipe extraction jobs as pending again, e.g. after a
+        restart interrupted them. Jobs that were already started max_attempts
+        times are marked as failed instead, so that a job that crashes the
+        server is not run forever.
+
+        Returns:
+            The IDs of all pending jobs, oldest first.
+        """
+
+    @abstractmethod
+    async def get_cached_extraction(
+        self, cache_keys: list[str], max_age: int
+    ) -> LLMRecipe | None:
+        """
+        Get an extracted recipe that was cached under any of the keys at most
+        max_age seconds ago.
+
+        Returns:
+            The recipe, or None if none is cached.
+        """
+
+    @abstractmethod
+    async def cache_extraction(self, cache_keys: list[str], recipe: LLMRecipe):
+        """Cache an extracted recipe under all of the keys."""
+
 
 class MySQLDatabase(Database):
     """A MySQL database class."""
@@ -182,8 +371,40 @@ class MySQLDatabase(Database):
     # MySQL user connection limit; shared across all requests via a single pool.
     MAX_POOL_SIZE = 14
 
-    def __init__(self, mysql_pool):
+    def __init__(self, mysql_pool, image_store: ImageStore | None = None):
         self.pool = mysql_pool
+        self.image_store = image_store or FileImageStore(
+            MySQLDatabase.CONFIG.get("image_store_path", "assets/images")
+        )
+        self.clicks = ClickBuffer(
+            self._add_clicks,
+            flush_interval=MySQLDatabase.CONFIG.get("click_flush_interval", 10),
+        )
+        self.recipe_cache = LRUCache(
+            "recipe",
+            max_entries=MySQLDatabase.CONFIG.get("recipe_cache_size", 512),
+            ttl=MySQLDatabase.CONFIG.get("recipe_cache_ttl", 300),
+        )
+        # Every authenticated request looks up its user; changes to a user
+        # invalidate it, the short TTL bounds changes made outside the backend.
+        self.user_cache = LRUCache(
+            "user",
+            max_entries=MySQLDatabase.CONFIG.get("user_cache_size", 1024),
+            ttl=MySQLDatabase.CONFIG.get("user_cache_ttl", 30),
+        )
+        # Bumped by every user change, so that a user loaded before it is not cached.
+        self.users_version = 0
+        self.listing_cache = LRUCache(
+            "listing",
+            max_entries=MySQLDatabase.CONFIG.get("listing_cache_size", 256),
+            ttl=MySQLDatabase.CONFIG.get("listing_cache_ttl", 60),
+            max_weight=MySQLDatabase.CONFIG.get(
+                "listing_cache_max_bytes", 16 * 1024 * 1024
+            ),
+            weigher=lambda recipe_page: len(recipe_page.model_dump_json()),
+        )
+        # Bumped by every recipe write; part of every listing cache key.
+        self.catalog_version = 0
 
     @staticmethod
     async def create():
@@ -196,7 +417,9 @@ class MySQLDatabase(Database):
             db=MySQLDatabase.CREDENTIALS["database_name"],
             autocommit=True,
         )
-        return MySQLDatabase(pool)
+        database = MySQLDatabase(pool)
+        database.clicks.start()
+        return database
 
     async def _run_query(self, query, values=None):
         async with self.pool.acquire() as conn:
@@ -206,6 +429,54 @@ class MySQLDatabase(Database):
                 rows = await cur.fetchall()
                 return rows
 
+    @asynccontextmanager
+    async def _transaction(self, storage_keys: Collection[str] = ()):
+        """
+        Run the enclosed queries on a single connection in one transaction.
+        The transaction is rolled back if the block raises.
+
+        :param storage_keys: Image files whose named locks are held from
+            before the transaction until after it ended. Writers hold them
+            around storing a file and inserting the rows that use it, and the
+            cleanup around checking that a file is unused and deleting it.
+
+        Raises:
+            OverloadedException: if a lock could not be taken in time.
+
+        Yields:
+            A cursor of the transaction's connection.
+        """
+        async with self.pool.acquire() as conn:
+            try:
+                await self._lock_storage_keys(conn, storage_keys)
+                await conn.begin()
+                try:
+                    async with conn.cursor() as cursor:
+                        yield cursor
+                    await conn.commit()
+                except BaseException:
+                    await conn.rollback()
+                    raise
+            finally:
+                if storage_keys:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute("SELECT RELEASE_ALL_LOCKS()")
+
+    @staticmethod
+    async def _lock_storage_keys(conn, storage_keys: Collection[str]):
+        async with conn.cursor() as cursor:
+            # Sorted, so that two holders never wait for each other. Storage
+            # keys are at most 64 characters, the limit of lock names.
+            for key in sorted(set(storage_keys)):
+                await cursor.execute(
+                    "SELECT GET_LOCK(%s, %s)", (key, STORAGE_LOCK_TIMEOUT)
+                )
+                (locked,) = await cursor.fetchone()
+                if locked != 1:
+                    raise OverloadedException(
+                        f"Timed out waiting for the lock of image file {key}."
+                    )
+
     async def create_recipe(self, recipe: RecipeBase, user: UserInDB) -> int:
         """
         Create a new recipe in the database.
@@ -213,49 +484,31 @@ class MySQLDatabase(Database):
         Returns:
             The ID of the new recipe.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "INSERT INTO Recipes (Title, Description, CookingTime, CoverImage, Portions, UserID) VALUES (%s, %s, %s, %s, %s, %s)"
-                val = (
-                    recipe.title,
-                    recipe.description,
-                    recipe.cooking_time,
+        async with self._transaction() as cursor:
+            sql = "INSERT INTO Recipes (Title, Description, CookingTime, CoverImage, Portions, UserID) VALUES (%s, %s, %s, %s, %s, %s)"
+            val = (
+                recipe.title,
+                recipe.description,
+                recipe.cooking_time,
+                (
                     recipe.cover_image
                     if recipe.cover_image and recipe.cover_image > 0
-                    else None,
-                    recipe.portions,
-                    user.id_,
-                )
-                await cursor.execute(sql, val)
-
-                id_ = cursor.lastrowid
-
-        queries = [
-            asyncio.gather(
-                *(self.create_category(category, id_) for category in recipe.categories)
-            ),
-            asyncio.gather(
-                *(
-                    self._create_ingredient(ingredient, id_)
-                    for ingredient in recipe.ingredients
-                )
-            ),
-            asyncio.gather(
-                *(self._create_recipe_step(step, id_) for step in recipe.steps)
-            ),
-        ]
-
-        if recipe.gallery_images:
-            queries.append(
-                asyncio.gather(
-                    *(
-                        self._add_recipe_to_image(id_, image_id)
-                        for image_id in recipe.gallery_images
-                    )
-                )
+                    else None
+                ),
+                recipe.portions,
+                user.id_,
             )
+            await cursor.execute(sql, val)
+
+            id_ = cursor.lastrowid
 
-        await asyncio.gather(*queries)
+            await self._insert_categories(cursor, id_, recipe.categories)
+            await self._insert_ingredients(cursor, id_, recipe.ingredients)
+            await self._insert_recipe_steps(cursor, id_, recipe.steps)
+            if recipe.gallery_images:
+                await self._link_images_to_recipe(cursor, id_, recipe.gallery_images)
+            await self._update_search_index(cursor, id_, recipe)
+        self._invalidate_recipe(id_)
 
         return id_
 
@@ -270,8 +523,46 @@ class MySQLDatabase(Database):
         Returns:
             The recipe object.
         """
-        run_background_task(self._increase_clicks_for_recipe(recipe_id))
+        cached = self.recipe_cache.get(recipe_id)
+        if cached is None:
+            catalog_version = self.catalog_version
+            recipe = await self._load_recipe(recipe_id)
+            # Views counted by this process after loading are added on top of
+            # the stored clicks while the recipe is cached.
+            click_offset = (
+                (recipe.clicks or 0)
+                + self.clicks.pending(recipe_id)
+                - self.clicks.recorded(recipe_id)
+            )
+            cached = (recipe, click_offset)
+            if catalog_version == self.catalog_version:
+                self.recipe_cache.put(recipe_id, cached)
+
+        self.clicks.record(recipe_id)
+        recipe, click_offset = cached
+        return recipe.model_copy(
+            update={"clicks": click_offset + self.clicks.recorded(recipe_id)}
+        )
+
+    def _invalidate_recipe(self, recipe_id: int | None = None):
+        """
+        Mark the catalog as changed, which invalidates all cached listings, and
+        drop a recipe, or all recipes if no ID is given, from the cache.
+        """
+        self.catalog_version += 1
+        if recipe_id is None:
+            self.recipe_cache.clear()
+        else:
+            self.recipe_cache.invalidate(recipe_id)
+
+    async def _load_recipe(self, recipe_id: int) -> Recipe:
+        """
+        Load a recipe from the database.
 
+        Raises:
+            NotFoundException: if the recipe could not be found.
+            ValidationError: if the object could not be validated.
+        """
         recipe, categories, ingredients, images, steps = await asyncio.gather(
             self._run_query(
                 "SELECT r.RecipeID, r.Title, r.Description, r.CookingTime, r.CoverImage, r.Portions, u.Username, u.UserID, r.Clicks FROM Recipes r, Users u WHERE r.RecipeID = %s AND r.UserID = u.UserID",
@@ -316,12 +607,16 @@ class MySQLDatabase(Database):
             clicks=clicks,
         )
 
-    async def _increase_clicks_for_recipe(self, recipe_id: int):
+    async def _add_clicks(self, clicks: dict[int, int]):
         """
-        Increase the number of clicks for a recipe in the database.
+        Add buffered clicks to several recipes with a single update.
+
+        Args:
+            clicks: A mapping of recipe IDs to their number of new clicks.
         """
         await self._run_query(
-            "UPDATE Recipes SET Clicks = Clicks + 1 WHERE RecipeID = %s", (recipe_id,)
+            f"UPDATE Recipes SET Clicks = Clicks + CASE RecipeID {' '.join(['WHEN %s THEN %s'] * len(clicks))} END WHERE RecipeID IN ({', '.join(['%s'] * len(clicks))})",
+            (*(value for item in clicks.items() for value in item), *clicks),
         )
 
     async def get_all_recipes(
@@ -332,66 +627,114 @@ class MySQLDatabase(Database):
         filter_categories: list[CategoryEnum] | None = None,
         sort_by: SortByEnum = SortByEnum.CLICKS,
         sort_order: SortOrderEnum = SortOrderEnum.DESC,
-    ) -> list[RecipeListing]:
+        cursor: str | None = None,
+    ) -> RecipeListingPage:
         """
         Get all recipes from the database.
 
+        Raises:
+            InvalidCursorException: if the cursor is malformed or was issued
+                for a different sorting.
+
         Returns:
-            A list of recipes.
-        """
-        if not search_string:
-            search_string = ""
+            A page of recipes with the cursor of the next page.
+        """
+        terms = tuple(query_terms(search_string))
+        if sort_by == SortByEnum.RELEVANCE and not terms:
+            sort_by = SortByEnum.CLICKS
+        filter_categories = tuple(sorted(set(filter_categories or [])))
+        if not limit or cursor:
+            page = None
+
+        key = (
+            self.catalog_version,
+            terms,
+            filter_categories,
+            sort_by,
+            sort_order,
+            limit,
+            page,
+            cursor,
+        )
+        recipe_page = self.listing_cache.get(key)
+        if recipe_page is None:
+            recipe_page = await self._load_recipe_page(
+                terms, filter_categories, sort_by, sort_order, limit, page, cursor
+            )
+            if key[0] == self.catalog_version:
+                self.listing_cache.put(key, recipe_page)
+        return recipe_page
 
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                if limit:
-                    limitation_query = " LIMIT %s"
-                    limit_parameters = (limit,)
-                    if page:
-                        limitation_query += " OFFSET %s"
-                        limit_parameters = (limit, (page - 1) * limit)
-                else:
-                    limitation_query = ""
-                    limit_parameters = tuple()
-
-                if filter_categories:
-                    await cursor.execute(
-                        f"SELECT DISTINCT r.RecipeID, r.Title, r.Description, r.CoverImage, r.UserID, r.Clicks, r.CookingTime FROM Recipes r, Categories c WHERE (r.Title LIKE CONCAT('%%', %s, '%%') OR r.Description LIKE CONCAT('%%', %s, '%%')) AND c.RecipeID = r.RecipeID AND c.Category IN ({', '.join(['%s'] * len(filter_categories))}) GROUP BY r.RecipeID HAVING COUNT(c.Category) = %s ORDER BY {sort_by} {sort_order} {limitation_query};",
-                        (
-                            search_string,
-                            search_string,
-                            *filter_categories,
-                            len(filter_categories),
-                        )
-                        + limit_parameters,
-                    )
-                else:
-                    await cursor.execute(
-                        f"SELECT RecipeID, Title, Description, CoverImage, UserID, Clicks, CookingTime FROM Recipes WHERE Title LIKE CONCAT('%%', %s, '%%') OR Description LIKE CONCAT('%%', %s, '%%') ORDER BY {sort_by} {sort_order} {limitation_query}",
-                        (search_string, search_string) + limit_parameters,
-                    )
-                result = await cursor.fetchall()
+    async def _load_recipe_page(
+        self,
+        terms: tuple[str, ...],
+        filter_categories: tuple[CategoryEnum, ...],
+        sort_by: SortByEnum,
+        sort_order: SortOrderEnum,
+        limit: int | None,
+        page: int | None,
+        cursor: str | None,
+    ) -> RecipeListingPage:
+        """
+        Load a page of recipes that match the search terms and contain all
+        of the given categories from the database.
+        """
+        joins = ""
+        conditions = []
+        parameters = []
+        for i, term in enumerate(terms):
+            # The last term is matched as a prefix so results show up while typing.
+            if i == len(terms) - 1:
+                term_condition, term = "Term LIKE %s", f"{term}%"
+            else:
+                term_condition = "Term = %s"
+            joins += f" JOIN (SELECT RecipeID, SUM(Weight) AS Score FROM SearchTerms WHERE {term_condition} GROUP BY RecipeID) s{i} ON s{i}.RecipeID = r.RecipeID"
+            parameters.append(term)
+        relevance = " + ".join(f"s{i}.Score" for i in range(len(terms))) or "0"
+        sort_key = relevance if sort_by == SortByEnum.RELEVANCE else SORT_KEYS[sort_by]
+
+        if filter_categories:
+            conditions.append(
+                f"r.RecipeID IN (SELECT RecipeID FROM Categories WHERE Category IN ({', '.join(['%s'] * len(filter_categories))}) GROUP BY RecipeID HAVING COUNT(Category) = %s)"
+            )
+            parameters += [*filter_categories, len(filter_categories)]
+        if cursor:
+            last_key, last_id = decode_cursor(cursor, sort_by, sort_order)
+            comparison = "<" if sort_order == SortOrderEnum.DESC else ">"
+            # The first condition alone bounds the range of the sort key index.
+            conditions.append(
+                f"{sort_key} {comparison}= %s AND ({sort_key} {comparison} %s OR r.RecipeID {comparison} %s)"
+            )
+            parameters += [last_key, last_key, last_id]
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        limitation_query = ""
+        if limit:
+            limitation_query = " LIMIT %s"
+            parameters.append(limit)
+            if page:
+                limitation_query += " OFFSET %s"
+                parameters.append((page - 1) * limit)
+
+        result = await self._run_query(
+            f"SELECT r.RecipeID, r.Title, r.Description, r.CoverImage, r.UserID, r.Clicks, r.CookingTime, u.Username, {sort_key} AS SortKey FROM Recipes r{joins} LEFT JOIN Users u ON u.UserID = r.UserID{where} ORDER BY SortKey {sort_order}, r.RecipeID {sort_order}{limitation_query}",
+            tuple(parameters),
+        )
         recipes = []
-        recipe_categories, creators = await asyncio.gather(
-            asyncio.gather(*(self.get_categories_by_recipe(r[0]) for r in result)),
-            asyncio.gather(*(self.get_user_by_id(r[4]) for r in result)),
+        recipe_categories = await self._get_categories_by_recipes(
+            [r[0] for r in result]
         )
         for (
-            (
-                id_,
-                title,
-                description,
-                image,
-                user_id,
-                clicks,
-                cooking_time,
-            ),
-            categories,
+            id_,
+            title,
+            description,
+            image,
+            user_id,
+            clicks,
+            cooking_time,
             creator,
-        ) in zip(result, recipe_categories, creators):
-            # if not image:
-            #     images = await self._get_gallery_images_by_recipe(id_)
-            #     image = images[0] if images else None
+            _,
+        ) in result:
             try:
                 recipes.append(
                     RecipeListing(
@@ -399,8 +742,8 @@ class MySQLDatabase(Database):
                         title=title if title else "",
                         description=description if description else "",
                         cover_image=image,
-                        categories=categories,
-                        creator=(creator.username if user_id else None),
+                        categories=recipe_categories.get(id_, []),
+                        creator=(creator if user_id else None),
                         clicks=clicks,
                         cooking_time=cooking_time,
                     )
@@ -409,7 +752,12 @@ class MySQLDatabase(Database):
                 print(f"Recipe with id {id_} could not be validated.")
                 continue
 
-        return recipes
+        next_cursor = None
+        if limit and len(result) == limit:
+            next_cursor = encode_cursor(
+                sort_by, sort_order, result[-1][8], result[-1][0]
+            )
+        return RecipeListingPage(recipes=recipes, next_cursor=next_cursor)
 
     async def get_recipes_by_category(self, category: CategoryEnum) -> list[int]:
         """
@@ -433,25 +781,29 @@ class MySQLDatabase(Database):
         Raises:
             UpdateFailedException: if the recipe could not be updated.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "UPDATE Recipes SET Title = %s, Description = %s, CookingTime = %s, CoverImage = %s, Portions = %s WHERE RecipeID = %s"
-                val = (
-                    recipe.title,
-                    recipe.description,
-                    recipe.cooking_time,
+        async with self._transaction() as cursor:
+            sql = "UPDATE Recipes SET Title = %s, Description = %s, CookingTime = %s, CoverImage = %s, Portions = %s WHERE RecipeID = %s"
+            val = (
+                recipe.title,
+                recipe.description,
+                recipe.cooking_time,
+                (
                     recipe.cover_image
                     if recipe.cover_image and recipe.cover_image > 0
-                    else None,
-                    recipe.portions,
-                    recipe.id_,
-                )
-                await cursor.execute(sql, val)
+                    else None
+                ),
+                recipe.portions,
+                recipe.id_,
+            )
+            await cursor.execute(sql, val)
 
-        await self._update_categories_by_recipe(recipe)
-        await self._update_ingredients_by_recipe(recipe)
-        await self._update_images_by_recipe(recipe)
-        await self._update_recipe_steps_by_recipe(recipe)
+            await self._update_categories_by_recipe(cursor, recipe)
+            await self._update_ingredients_by_recipe(cursor, recipe)
+            deleted_files = await self._update_images_by_recipe(cursor, recipe)
+            await self._update_recipe_steps_by_recipe(cursor, recipe)
+            await self._update_search_index(cursor, recipe.id_, recipe)
+        self._invalidate_recipe(recipe.id_)
+        await self._delete_image_files(deleted_files)
 
     async def delete_recipe(self, recipe_id: int) -> bool:
         """
@@ -471,124 +823,297 @@ class MySQLDatabase(Database):
                         f"Recipe with id {recipe_id} not found in database."
                     )
 
-    async def is_authorized(self, user_id: int, recipe_id: int) -> bool:
-        """Check if the user is authorized to access the recipe."""
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "SELECT IsAdmin, Disabled FROM Users WHERE UserID = %s"
-                val = (user_id,)
-                await cursor.execute(sql, val)
-                result = await cursor.fetchone()
-                is_admin, disabled = result
-                if disabled:
-                    return False
-                if is_admin:
-                    return True
-            async with conn.cursor() as cursor:
-                sql = "SELECT UserId FROM Recipes WHERE RecipeID = %s"
-                val = (recipe_id,)
+                sql = "DELETE FROM SearchTerms WHERE RecipeID = %s"
                 await cursor.execute(sql, val)
-                result = await cursor.fetchone()
-                return result[0] == user_id
+        self._invalidate_recipe(recipe_id)
 
-    async def _create_recipe_step(self, recipe_step: RecipeStep, recipe_id: int):
+    async def _update_search_index(self, cursor, recipe_id: int, recipe: RecipeBase):
         """
-        Create a new recipe step in the database.
+        Replace the search index terms of a single recipe.
+        """
+        await self._write_search_terms(
+            cursor,
+            recipe_id,
+            build_terms(
+                recipe.title,
+                recipe.description,
+                [ingredient.name for ingredient in recipe.ingredients],
+            ),
+        )
+
+    async def _write_search_terms(self, cursor, recipe_id: int, terms: dict[str, int]):
+        """
+        Write the weighted search terms of a recipe, dropping its previous terms.
+        """
+        await cursor.execute(
+            "DELETE FROM SearchTerms WHERE RecipeID = %s", (recipe_id,)
+        )
+        if terms:
+            await cursor.executemany(
+                "INSERT INTO SearchTerms (RecipeID, Term, Weight) VALUES (%s, %s, %s)",
+                [(recipe_id, term, weight) for term, weight in terms.items()],
+            )
+
+    async def build_search_index(self) -> int:
+        """
+        Index every recipe in the database. Only needed once to fill the index
+        for recipes that were created before the search index existed.
 
         Returns:
-            The ID of the new recipe step.
+            The number of indexed recipes.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "INSERT INTO RecipeSteps (RecipeID, OrderID, Step) VALUES (%s, %s, %s)"
-                val = (recipe_id, recipe_step.order_id, recipe_step.step)
-                await cursor.execute(sql, val)
+        recipes, ingredients = await asyncio.gather(
+            self._run_query("SELECT RecipeID, Title, Description FROM Recipes"),
+            self._run_query("SELECT RecipeID, Ingredient FROM Ingredients"),
+        )
+        ingredients_by_recipe = {}
+        for recipe_id, ingredient in ingredients:
+            ingredients_by_recipe.setdefault(recipe_id, []).append(ingredient)
+
+        for recipe_id, title, description in recipes:
+            async with self._transaction() as cursor:
+                await self._write_search_terms(
+                    cursor,
+                    recipe_id,
+                    build_terms(
+                        title, description, ingredients_by_recipe.get(recipe_id, [])
+                    ),
+                )
+        return len(recipes)
 
-                id_ = cursor.lastrowid
-        if not recipe_step.images:
+    async def is_authorized(self, user_id: int, recipe_id: int) -> bool:
+        """Check if the user is authorized to access the recipe."""
+        try:
+            user = await self.get_user_by_id(user_id)
+        except NotFoundException:
+            return False
+        if user.disabled:
+            return False
+        if user.is_admin:
+            return True
+
+        cached = self.recipe_cache.get(recipe_id)
+        if cached is not None:
+            return cached[0].creator_id == user_id
+        sql = "SELECT UserId FROM Recipes WHERE RecipeID = %s"
+        val = (recipe_id,)
+        result = await self._run_query(sql, val)
+        return len(result) > 0 and result[0][0] == user_id
+
+    async def _insert_recipe_steps(
+        self, cursor, recipe_id: int, recipe_steps: list[RecipeStep]
+    ):
+        """
+        Insert recipe steps with a single multi-row insert and link their images.
+        """
+        if not recipe_steps:
+            return
+        await cursor.executemany(
+            "INSERT INTO RecipeSteps (RecipeID, OrderID, Step) VALUES (%s, %s, %s)",
+            [(recipe_id, step.order_id, step.step) for step in recipe_steps],
+        )
+        if not any(step.images for step in recipe_steps):
             return
-        for image_id in recipe_step.images:
-            await self._add_recipe_step_to_image(id_, image_id)
+
+        # The rows of a multi-row insert receive increasing IDs in insertion order.
+        await cursor.execute(
+            "SELECT StepID FROM RecipeSteps WHERE RecipeID = %s ORDER BY StepID DESC LIMIT %s",
+            (recipe_id, len(recipe_steps)),
+        )
+        step_ids = reversed([step_id for (step_id,) in await cursor.fetchall()])
+        await self._link_images_to_steps(
+            cursor,
+            {
+                image_id: step_id
+                for step_id, step in zip(step_ids, recipe_steps)
+                for image_id in step.images or []
+            },
+        )
 
     async def _get_recipe_steps_by_recipe(self, recipe_id: int) -> list[RecipeStep]:
         """
-        Get all recipe steps for a recipe from the database.
+        Get all recipe steps for a recipe, including their images, from the
+        database with a single query.
 
         Returns:
             A list of recipe steps.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = (
-                    "SELECT StepID, OrderID, Step FROM RecipeSteps WHERE RecipeID = %s"
-                )
-                val = (recipe_id,)
-                await cursor.execute(sql, val)
-                result = await cursor.fetchall()
-        steps = []
-        for step_id, order_id, step in result:
-            images = await self._get_images_by_recipe_step(step_id)
-            steps.append(RecipeStep(order_id=order_id, step=step, images=images))
-        return steps
-
-    async def _update_recipe_steps_by_recipe(self, recipe: Recipe):
-        """Update the steps for a recipe in the database."""
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "Delete FROM RecipeSteps WHERE RecipeID = %s"
-                val = (recipe.id_,)
-                await cursor.execute(sql, val)
+        result = await self._run_query(RECIPE_STEPS_QUERY, (recipe_id,))
+        return list(_group_recipe_steps(result).values())
+
+    async def _update_recipe_steps_by_recipe(self, cursor, recipe: Recipe):
+        """
+        Update the steps for a recipe in the database. Stored steps are matched
+        to the new steps by position and only changed rows are written.
+        """
+        await cursor.execute(RECIPE_STEPS_QUERY, (recipe.id_,))
+        stored_steps = _group_recipe_steps(await cursor.fetchall())
+
+        changed_steps = []
+        linked_images = {}
+        unlinked_images = set()
+        for (step_id, stored), step in zip(stored_steps.items(), recipe.steps):
+            if (stored.order_id, stored.step) != (step.order_id, step.step):
+                changed_steps.append((step.order_id, step.step, step_id))
+            images = set(step.images or [])
+            unlinked_images.update(set(stored.images) - images)
+            linked_images.update(
+                (image_id, step_id) for image_id in images - set(stored.images)
+            )
 
-        for step in recipe.steps:
-            await self._create_recipe_step(step, recipe.id_)
+        removed_step_ids = list(stored_steps)[len(recipe.steps) :]
+        for step_id in removed_step_ids:
+            unlinked_images.update(stored_steps[step_id].images)
+        unlinked_images -= linked_images.keys()
 
-    async def create_image(self, image: bytes) -> int:
+        if changed_steps:
+            await cursor.executemany(
+                "UPDATE RecipeSteps SET OrderID = %s, Step = %s WHERE StepID = %s",
+                changed_steps,
+            )
+        if unlinked_images:
+            await cursor.execute(
+                f"UPDATE Images SET StepID = NULL WHERE ImageID IN ({', '.join(['%s'] * len(unlinked_images))})",
+                tuple(unlinked_images),
+            )
+        if removed_step_ids:
+            await cursor.execute(
+                f"DELETE FROM RecipeSteps WHERE StepID IN ({', '.join(['%s'] * len(removed_step_ids))})",
+                tuple(removed_step_ids),
+            )
+        await self._link_images_to_steps(cursor, linked_images)
+        await self._insert_recipe_steps(
+            cursor, recipe.id_, recipe.steps[len(stored_steps) :]
+        )
+
+    async def create_image(
+        self, image: bytes, mime_type: str, variants: dict[int, bytes] | None = None
+    ) -> int:
         """
-        Create a new image in the database.
+        Create a new image, with smaller variants of it by size, in the database.
+        Every upload gets an image of its own, identical uploads only share the
+        stored files.
 
         Returns:
             The ID of the new image.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "INSERT INTO Images (Image) VALUES (%s)"
-                val = (image,)
-                await cursor.execute(sql, val)
-
-                id_ = cursor.lastrowid
+        variants = variants or {}
+        keys = [self.image_store.key(data) for data in (image, *variants.values())]
+        # Store the files under the locks, so that a concurrent cleanup cannot
+        # delete a file before the rows that use it are committed.
+        async with self._transaction(keys) as cursor:
+            storage_key, *variant_keys = await asyncio.gather(
+                self.image_store.put(image),
+                *(self.image_store.put(data) for data in variants.values()),
+            )
+            sql = "INSERT INTO Images (StorageKey, MimeType) VALUES (%s, %s)"
+            val = (storage_key, mime_type)
+            await cursor.execute(sql, val)
+
+            id_ = cursor.lastrowid
+            if variants:
+                await cursor.executemany(
+                    "INSERT INTO ImageVariants (ImageID, Width, StorageKey) VALUES (%s, %s, %s)",
+                    [
+                        (id_, width, variant_key)
+                        for width, variant_key in zip(variants, variant_keys)
+                    ],
+                )
         return id_
 
-    async def get_image(self, image_id: int) -> bytes:
+    async def get_image(
+        self, image_id: int, width: int | None = None
+    ) -> tuple[str, str]:
         """
-        Get an image from the database.
+        Get an image from the database. If a width is given, get the smallest
+        variant of the image that is at least as wide, or the full image if
+        there is none. Images that are still stored in the database are moved
+        to the image store first.
 
         Raises:
             NotFoundException: if the image could not be found.
-            ValidationError: if the image could not be validated.
 
         Returns:
-            The image object.
+            The path of the image file and its MIME type.
         """
         async with self.pool.acquire() as conn:
             async with conn.cursor() as cursor:
-                sql = "SELECT Image FROM Images WHERE ImageID = %s"
-                val = (image_id,)
+                sql = "SELECT i.StorageKey, i.MimeType, v.StorageKey FROM Images i LEFT JOIN ImageVariants v ON v.ImageID = i.ImageID AND v.Width >= %s WHERE i.ImageID = %s ORDER BY v.Width LIMIT 1"
+                val = (width, image_id)
                 await cursor.execute(sql, val)
                 result = await cursor.fetchone()
                 if cursor.rowcount == 0:
                     raise NotFoundException(
                         f"Image with id {image_id} not found in database."
                     )
-        return result[0]
+        storage_key, mime_type, variant_key = result
+        if variant_key is not None:
+            storage_key = variant_key
+        elif storage_key is None:
+            storage_key = await self._move_image_to_store(image_id)
+        return (
+            self.image_store.path(storage_key),
+            mime_type or DEFAULT_IMAGE_MIME_TYPE,
+        )
+
+    async def _move_image_to_store(self, image_id: int) -> str:
+        """
+        Move the data of an image that is still stored in the database to the
+        image store.
+
+        Returns:
+            The storage key of the image.
+        """
+        ((storage_key, data),) = await self._run_query(
+            "SELECT StorageKey, Image FROM Images WHERE ImageID = %s", (image_id,)
+        )
+        if storage_key is not None:
+            # Moved by a concurrent request in the meantime.
+            return storage_key
+        async with self._transaction([self.image_store.key(data)]) as cursor:
+            storage_key = await self.image_store.put(data)
+            await cursor.execute(
+                "UPDATE Images SET StorageKey = %s, Image = NULL WHERE ImageID = %s AND StorageKey IS NULL",
+                (storage_key, image_id),
+            )
+        return storage_key
+
+    async def get_image_mime_type(self, image_id: int) -> str:
+        """
+        Get the MIME type of an image without loading the image data.
+
+        Raises:
+            NotFoundException: if the image could not be found.
+
+        Returns:
+            The MIME type of the image.
+        """
+        result = await self._run_query(
+            "SELECT MimeType FROM Images WHERE ImageID = %s", (image_id,)
+        )
+        if not result:
+            raise NotFoundException(f"Image with id {image_id} not found in database.")
+        return result[0][0] or DEFAULT_IMAGE_MIME_TYPE
 
     async def delete_image(self, image_id: int):
         """
-        Delete an image from the database.
+        Delete an image from the database. Images that are still used by a
+        recipe are kept, they are deleted once the recipe is saved without them.
 
         Raises:
             NotFoundException: if the image could not be found.
         """
-        await self._run_query("DELETE FROM Images WHERE ImageID = %s", (image_id,))
+        async with self._transaction() as cursor:
+            await cursor.execute(
+                "SELECT ImageID FROM Images WHERE ImageID = %s AND RecipeID IS NULL FOR UPDATE",
+                (image_id,),
+            )
+            unlinked = await cursor.fetchone()
+            storage_keys = (
+                await self._delete_images(cursor, [image_id]) if unlinked else []
+            )
+        self._invalidate_recipe()
+        await self._delete_image_files(storage_keys)
 
     async def _get_gallery_images_by_recipe(self, recipe_id: int) -> list[int]:
         """
@@ -601,101 +1126,175 @@ class MySQLDatabase(Database):
         result = await self._run_query(sql, (recipe_id,))
         return [image_id for (image_id,) in result]
 
-    async def _update_images_by_recipe(self, recipe: Recipe):
+    async def _update_images_by_recipe(self, cursor, recipe: Recipe) -> list[str]:
         """
         Update the images for a recipe in the database.
-        """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "SELECT ImageID FROM Images WHERE RecipeID = %s"
-                val = (recipe.id_,)
-                await cursor.execute(sql, val)
-                current_images = [image_id for (image_id,) in await cursor.fetchall()]
-        recipe_images = set(recipe.gallery_images) | {recipe.cover_image}
-        deleted_images = [
-            image_id for image_id in current_images if image_id not in recipe_images
-        ]
-        added_images = [
-            image_id for image_id in recipe_images if image_id not in current_images
-        ]
-        for image_id in deleted_images:
-            await self._delete_image(image_id)
-        for image_id in added_images:
-            await self._add_recipe_to_image(recipe.id_, image_id)
 
-    async def _add_recipe_to_image(self, recipe_id: int, image_id: int):
-        """
-        Add a recipe to an image in the database.
+        Returns:
+            The storage keys of the deleted images.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "UPDATE Images SET RecipeID = %s WHERE ImageID = %s"
-                val = (recipe_id, image_id)
-                await cursor.execute(sql, val)
+        await cursor.execute(
+            "SELECT ImageID FROM Images WHERE RecipeID = %s", (recipe.id_,)
+        )
+        current_images = {image_id for (image_id,) in await cursor.fetchall()}
+        recipe_images = set(recipe.gallery_images or []) | {recipe.cover_image}
+        recipe_images.discard(None)
+        step_images = {
+            image_id for step in recipe.steps or [] for image_id in step.images or []
+        }
+
+        deleted_files = []
+        deleted_images = current_images - recipe_images - step_images
+        if deleted_images:
+            deleted_files = await self._delete_images(cursor, list(deleted_images))
+        added_images = recipe_images - current_images
+        if added_images:
+            await self._link_images_to_recipe(cursor, recipe.id_, list(added_images))
+        return deleted_files
+
+    async def _link_images_to_recipe(
+        self, cursor, recipe_id: int, image_ids: list[int]
+    ):
+        """
+        Link several images to a recipe with a single update.
+        """
+        await cursor.execute(
+            f"UPDATE Images SET RecipeID = %s WHERE ImageID IN ({', '.join(['%s'] * len(image_ids))})",
+            (recipe_id, *image_ids),
+        )
 
-    async def _add_recipe_step_to_image(self, step_id: int, image_id: int):
+    async def _link_images_to_steps(self, cursor, step_images: dict[int, int]):
         """
-        Add a recipe step to an image in the database.
+        Link images to recipe steps with a single update.
+
+        Args:
+            step_images: A mapping of image IDs to the ID of their step.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "UPDATE Images SET StepID = %s WHERE ImageID = %s"
-                val = (step_id, image_id)
-                await cursor.execute(sql, val)
+        if not step_images:
+            return
+        await cursor.execute(
+            f"UPDATE Images SET StepID = CASE ImageID {' '.join(['WHEN %s THEN %s'] * len(step_images))} END WHERE ImageID IN ({', '.join(['%s'] * len(step_images))})",
+            (
+                *(value for item in step_images.items() for value in item),
+                *step_images,
+            ),
+        )
 
-    async def _get_images_by_recipe_step(self, step_id: int) -> list[int]:
+    async def _delete_images(self, cursor, image_ids: list[int]) -> list[str]:
         """
-        Get all images for a recipe step from the database.
+        Delete several images from the database, except for images that a recipe
+        step or a recipe cover still uses. Their files are left in the image
+        store, delete them with `_delete_image_files` once the transaction is
+        committed.
 
         Returns:
-            A list of images.
+            The storage keys of the deleted images and their variants.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "SELECT ImageID FROM Images WHERE StepID = %s"
-                val = (step_id,)
-                await cursor.execute(sql, val)
-                result = await cursor.fetchall()
-        return [image_id for (image_id,) in result]
+        await cursor.execute(
+            f"SELECT i.ImageID, i.StorageKey FROM Images i WHERE i.ImageID IN ({', '.join(['%s'] * len(image_ids))}) AND i.StepID IS NULL AND NOT EXISTS (SELECT 1 FROM Recipes r WHERE r.CoverImage = i.ImageID) FOR UPDATE",
+            tuple(image_ids),
+        )
+        rows = await cursor.fetchall()
+        if not rows:
+            return []
+        image_ids = [image_id for image_id, _ in rows]
+        storage_keys = [key for _, key in rows if key is not None]
+
+        placeholders = ", ".join(["%s"] * len(image_ids))
+        await cursor.execute(
+            f"SELECT StorageKey FROM ImageVariants WHERE ImageID IN ({placeholders})",
+            tuple(image_ids),
+        )
+        storage_keys += [key for (key,) in await cursor.fetchall()]
+        await cursor.execute(
+            f"DELETE FROM ImageVariants WHERE ImageID IN ({placeholders})",
+            tuple(image_ids),
+        )
+        await cursor.execute(
+            f"DELETE FROM Images WHERE ImageID IN ({placeholders})", tuple(image_ids)
+        )
+        return storage_keys
 
-    async def _delete_image(self, image_id: int):
+    async def _delete_image_files(self, storage_keys: list[str]):
         """
-        Delete an image from the database.
-
-        Raises:
-            NotFoundException: if the image could not be found.
+        Delete image files from the image store, unless another image with the
+        same content still uses them. The references are checked under the
+        locks of the files, so an image that is created in the meantime keeps
+        its file.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "DELETE FROM Images WHERE ImageID = %s"
-                val = (image_id,)
-                await cursor.execute(sql, val)
-
-                if cursor.rowcount == 0:
-                    raise NotFoundException(
-                        f"Image with id {image_id} not found in database."
-                    )
+        storage_keys = set(storage_keys)
+        if not storage_keys:
+            return
+        placeholders = ", ".join(["%s"] * len(storage_keys))
+        async with self._transaction(storage_keys) as cursor:
+            await cursor.execute(
+                f"SELECT StorageKey FROM Images WHERE StorageKey IN ({placeholders}) UNION SELECT StorageKey FROM ImageVariants WHERE StorageKey IN ({placeholders})",
+                (*storage_keys, *storage_keys),
+            )
+            storage_keys -= {key for (key,) in await cursor.fetchall()}
+            await asyncio.gather(
+                *(self.image_store.delete(key) for key in storage_keys)
+            )
 
     async def delete_unused_images(self):
         """
         Delete all images that are not used in any recipe.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "DELETE FROM Images WHERE RecipeID IS NULL AND TimeStamp < DATE_SUB(NOW(), INTERVAL 1 DAY)"
-                await cursor.execute(sql)
+        async with self._transaction() as cursor:
+            await cursor.execute(
+                "SELECT ImageID FROM Images WHERE RecipeID IS NULL AND TimeStamp < DATE_SUB(NOW(), INTERVAL 1 DAY) FOR UPDATE"
+            )
+            image_ids = [image_id for (image_id,) in await cursor.fetchall()]
+            if not image_ids:
+                return
+            storage_keys = await self._delete_images(cursor, image_ids)
+        await self._delete_image_files(storage_keys)
+
+    async def migrate_images(self, batch_size: int = 100) -> int:
+        """
+        Move the data of images that are still stored in the database to the
+        image store, one batch of images at a time.
+
+        Returns:
+            The number of moved images.
+        """
+        count = 0
+        last_id = 0
+        while True:
+            images = await self._run_query(
+                "SELECT ImageID, Image FROM Images WHERE ImageID > %s AND StorageKey IS NULL AND Image IS NOT NULL ORDER BY ImageID LIMIT %s",
+                (last_id, batch_size),
+            )
+            if not images:
+                return count
+            keys = [self.image_store.key(data) for _, data in images]
+            async with self._transaction(keys) as cursor:
+                storage_keys = await asyncio.gather(
+                    *(self.image_store.put(data) for _, data in images)
+                )
+                await cursor.executemany(
+                    "UPDATE Images SET StorageKey = %s, Image = NULL WHERE ImageID = %s",
+                    [
+                        (storage_key, image_id)
+                        for storage_key, (image_id, _) in zip(storage_keys, images)
+                    ],
+                )
+            count += len(images)
+            last_id = images[-1][0]
 
-    async def create_category(self, category: CategoryEnum, recipe_id: int):
+    async def _insert_categories(
+        self, cursor, recipe_id: int, categories: list[CategoryEnum]
+    ):
         """
-        Create a new category in the database.
+        Insert the categories of a recipe with a single multi-row insert.
         """
-        if category not in CategoryEnum:
+        categories = [category for category in categories if category in CategoryEnum]
+        if not categories:
             return
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "INSERT INTO Categories (RecipeID, Category) VALUES (%s, %s)"
-                val = (recipe_id, category)
-                await cursor.execute(sql, val)
+        await cursor.executemany(
+            "INSERT INTO Categories (RecipeID, Category) VALUES (%s, %s)",
+            [(recipe_id, category) for category in categories],
+        )
 
     async def get_categories_by_recipe(self, recipe_id: int) -> list[CategoryEnum]:
         """
@@ -709,18 +1308,50 @@ class MySQLDatabase(Database):
         )
         return [category for (category,) in result]
 
-    async def _update_categories_by_recipe(self, recipe: Recipe):
+    async def _get_categories_by_recipes(
+        self, recipe_ids: list[int]
+    ) -> dict[int, list[CategoryEnum]]:
+        """
+        Get the categories for several recipes with a single query.
+
+        Returns:
+            A mapping of recipe IDs to their categories.
+        """
+        if not recipe_ids:
+            return {}
+        result = await self._run_query(
+            f"SELECT RecipeID, Category FROM Categories WHERE RecipeID IN ({', '.join(['%s'] * len(recipe_ids))})",
+            tuple(recipe_ids),
+        )
+        categories = {}
+        for recipe_id, category in result:
+            categories.setdefault(recipe_id, []).append(category)
+        return categories
+
+    async def _update_categories_by_recipe(self, cursor, recipe: Recipe):
         """
         Update the categories for a recipe in the database.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "DELETE FROM Categories WHERE RecipeID = %s"
-                val = (recipe.id_,)
-                await cursor.execute(sql, val)
+        await cursor.execute(
+            "SELECT Category FROM Categories WHERE RecipeID = %s", (recipe.id_,)
+        )
+        stored_categories = {category for (category,) in await cursor.fetchall()}
 
-        for category in recipe.categories:
-            await self.create_category(category, recipe.id_)
+        removed_categories = stored_categories - set(recipe.categories)
+        if removed_categories:
+            await cursor.execute(
+                f"DELETE FROM Categories WHERE RecipeID = %s AND Category IN ({', '.join(['%s'] * len(removed_categories))})",
+                (recipe.id_, *removed_categories),
+            )
+        await self._insert_categories(
+            cursor,
+            recipe.id_,
+            [
+                category
+                for category in dict.fromkeys(recipe.categories)
+                if category not in stored_categories
+            ],
+        )
 
     async def delete_category(self, category: str, recipe_id: int):
         """
@@ -745,19 +1376,27 @@ class MySQLDatabase(Database):
             )
         ]
 
-    async def _create_ingredient(self, ingredient: Ingredient, recipe_id: int):
+    async def _insert_ingredients(
+        self, cursor, recipe_id: int, ingredients: list[Ingredient]
+    ):
         """
-        Create a new ingredient in the database.
+        Insert ingredients with a single multi-row insert.
         """
-        sql = "INSERT INTO Ingredients (RecipeID, Ingredient, Unit, Amount, IngredientGroup) VALUES (%s, %s, %s, %s, %s)"
-        val = (
-            recipe_id,
-            ingredient.name,
-            str(ingredient.unit),
-            ingredient.amount,
-            ingredient.group,
+        if not ingredients:
+            return
+        await cursor.executemany(
+            "INSERT INTO Ingredients (RecipeID, Ingredient, Unit, Amount, IngredientGroup) VALUES (%s, %s, %s, %s, %s)",
+            [
+                (
+                    recipe_id,
+                    ingredient.name,
+                    str(ingredient.unit),
+                    ingredient.amount,
+                    ingredient.group,
+                )
+                for ingredient in ingredients
+            ],
         )
-        await self._run_query(sql, val)
 
     async def _get_ingredients_by_recipe(self, recipe_id: int) -> list[Ingredient]:
         """
@@ -767,7 +1406,7 @@ class MySQLDatabase(Database):
             A list of ingredients.
         """
         result = await self._run_query(
-            "SELECT Ingredient, Unit, Amount, IngredientGroup FROM Ingredients WHERE RecipeID = %s",
+            "SELECT Ingredient, Unit, Amount, IngredientGroup FROM Ingredients WHERE RecipeID = %s ORDER BY IngredientID",
             (recipe_id,),
         )
         return [
@@ -775,18 +1414,53 @@ class MySQLDatabase(Database):
             for ingredient, unit, amount, group in result
         ]
 
-    async def _update_ingredients_by_recipe(self, recipe: Recipe):
+    async def _update_ingredients_by_recipe(self, cursor, recipe: Recipe):
         """
         Update the ingredients for a recipe in the database.
+
+        Ingredients are listed in insertion order, so the stored rows are
+        rewritten in place by ID, the rows left over are deleted and the
+        additional ingredients are inserted.
         """
-        async with self.pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                sql = "DELETE FROM Ingredients WHERE RecipeID = %s"
-                val = (recipe.id_,)
-                await cursor.execute(sql, val)
+        await cursor.execute(
+            "SELECT IngredientID, Ingredient, Unit, Amount, IngredientGroup FROM Ingredients WHERE RecipeID = %s ORDER BY IngredientID",
+            (recipe.id_,),
+        )
+        stored_rows = await cursor.fetchall()
+        changed_rows = [
+            (
+                ingredient_id,
+                recipe.id_,
+                new_ingredient.name,
+                str(new_ingredient.unit),
+                new_ingredient.amount,
+                new_ingredient.group,
+            )
+            for (ingredient_id, name, unit, amount, group), new_ingredient in zip(
+                stored_rows, recipe.ingredients
+            )
+            # Amount is a FLOAT column, so it only matches approximately.
+            if (name, unit, group)
+            != (new_ingredient.name, str(new_ingredient.unit), new_ingredient.group)
+            or not math.isclose(amount, new_ingredient.amount, rel_tol=1e-6)
+        ]
+        if changed_rows:
+            # A single multi-row statement that updates the rows by their ID.
+            await cursor.executemany(
+                "INSERT INTO Ingredients (IngredientID, RecipeID, Ingredient, Unit, Amount, IngredientGroup) VALUES (%s, %s, %s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE Ingredient = VALUES(Ingredient), Unit = VALUES(Unit), Amount = VALUES(Amount), IngredientGroup = VALUES(IngredientGroup)",
+                changed_rows,
+            )
 
-        for ingredient in recipe.ingredients:
-            await self._create_ingredient(ingredient, recipe.id_)
+        if stale_rows := stored_rows[len(recipe.ingredients) :]:
+            placeholders = ", ".join(["%s"] * len(stale_rows))
+            await cursor.execute(
+                f"DELETE FROM Ingredients WHERE IngredientID IN ({placeholders})",
+                [row[0] for row in stale_rows],
+            )
+        await self._insert_ingredients(
+            cursor, recipe.id_, recipe.ingredients[len(stored_rows) :]
+        )
 
     async def get_user_by_username(self, username: str) -> UserInDB:
         """
@@ -829,6 +1503,11 @@ class MySQLDatabase(Database):
         """
         if user_id is None:
             return None
+        user = self.user_cache.get(user_id)
+        if user is not None:
+            return user.model_copy()
+
+        users_version = self.users_version
         sql = (
             "SELECT Username, Password, IsAdmin, Disabled FROM Users WHERE UserID = %s"
         )
@@ -837,13 +1516,21 @@ class MySQLDatabase(Database):
         if len(result) == 0:
             raise NotFoundException(f"User with id {user_id} not found in database.")
         username, password, is_admin, disabled = result[0]
-        return UserInDB(
+        user = UserInDB(
             username=username,
             disabled=disabled,
             id_=user_id,
             is_admin=is_admin,
             hashed_password=password,
         )
+        if users_version == self.users_version:
+            self.user_cache.put(user_id, user)
+        return user.model_copy()
+
+    def invalidate_user(self, user_id: int):
+        """Drop a user from the user cache."""
+        self.users_version += 1
+        self.user_cache.invalidate(user_id)
 
     async def create_user(
         self, username: str, password: str, is_admin: bool
@@ -863,6 +1550,7 @@ class MySQLDatabase(Database):
                 if cursor.rowcount == 0:
                     return None
                 user_id = cursor.lastrowid
+        self.invalidate_user(user_id)
         return UserInDB(
             username=username,
             disabled=False,
@@ -871,6 +1559,162 @@ class MySQLDatabase(Database):
             hashed_password=password,
         )
 
+    async def create_extraction_job(
+        self,
+        user_id: int,
+        kind: ExtractionKindEnum,
+        source: str,
+        use_cache: bool = True,
+    ) -> int:
+        """
+        Create a pending recipe extraction job in the database.
+
+        Returns:
+            The ID of the new job.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                sql = "INSERT INTO ExtractionJobs (UserID, Kind, Source, Status, UseCache) VALUES (%s, %s, %s, %s, %s)"
+                val = (user_id, kind, source, ExtractionStatusEnum.PENDING, use_cache)
+                await cursor.execute(sql, val)
+                id_ = cursor.lastrowid
+        return id_
+
+    async def get_extraction_job(self, job_id: int) -> ExtractionJob:
+        """
+        Get a recipe extraction job from the database.
+
+        Raises:
+            NotFoundException: if the job could not be found.
+
+        Returns:
+            The job object.
+        """
+        result = await self._run_query(
+            "SELECT UserID, Kind, Status, RecipeID, Error FROM ExtractionJobs WHERE JobID = %s",
+            (job_id,),
+        )
+        if not result:
+            raise NotFoundException(
+                f"Extraction job with id {job_id} not found in database."
+            )
+        user_id, kind, status, recipe_id, error = result[0]
+        return ExtractionJob(
+            id_=job_id,
+            user_id=user_id,
+            kind=kind,
+            status=status,
+            recipe_id=recipe_id,
+            error=error,
+        )
+
+    async def claim_extraction_job(self, job_id: int) -> ExtractionTask | None:
+        """
+        Mark a pending recipe extraction job as running and count the attempt.
+
+        Returns:
+            The input of the job, or None if the job is not pending.
+        """
+        async with self._transaction() as cursor:
+            await cursor.execute(
+                "SELECT UserID, Kind, Source, UseCache FROM ExtractionJobs WHERE JobID = %s AND Status = %s FOR UPDATE",
+                (job_id, ExtractionStatusEnum.PENDING),
+            )
+            result = await cursor.fetchone()
+            if result is None:
+                return None
+            await cursor.execute(
+                "UPDATE ExtractionJobs SET Status = %s, Attempts = Attempts + 1 WHERE JobID = %s",
+                (ExtractionStatusEnum.RUNNING, job_id),
+            )
+        user_id, kind, source, use_cache = result
+        return ExtractionTask(
+            id_=job_id,
+            kind=kind,
+            source=source,
+            user_id=user_id,
+            use_cache=bool(use_cache),
+        )
+
+    async def finish_extraction_job(
+        self,
+        job_id: int,
+        recipe_id: int | None = None,
+        error: str | None = None,
+    ):
+        """Mark a running recipe extraction job as done, or as failed on error."""
+        status = (
+            ExtractionStatusEnum.FAILED
+            if error is not None
+            else ExtractionStatusEnum.DONE
+        )
+        await self._run_query(
+            "UPDATE ExtractionJobs SET Status = %s, RecipeID = %s, Error = %s WHERE JobID = %s",
+            (status, recipe_id, error, job_id),
+        )
+
+    async def get_unfinished_extraction_jobs(self, max_attempts: int) -> list[int]:
+        """
+        Mark running recipe extraction jobs as pending again, e.g. after a
+        restart interrupted them. Jobs that were already started max_attempts
+        times are marked as failed instead, so that a job that crashes the
+        server is not run forever.
+
+        Returns:
+            The IDs of all pending jobs, oldest first.
+        """
+        async with self._transaction() as cursor:
+            await cursor.execute(
+                "UPDATE ExtractionJobs SET Status = %s, Error = %s WHERE Status = %s AND Attempts >= %s",
+                (
+                    ExtractionStatusEnum.FAILED,
+                    "The extraction was interrupted too often.",
+                    ExtractionStatusEnum.RUNNING,
+                    max_attempts,
+                ),
+            )
+            await cursor.execute(
+                "UPDATE ExtractionJobs SET Status = %s WHERE Status = %s",
+                (ExtractionStatusEnum.PENDING, ExtractionStatusEnum.RUNNING),
+            )
+            await cursor.execute(
+                "SELECT JobID FROM ExtractionJobs WHERE Status = %s ORDER BY JobID",
+                (ExtractionStatusEnum.PENDING,),
+            )
+            return [job_id for (job_id,) in await cursor.fetchall()]
+
+    async def get_cached_extraction(
+        self, cache_keys: list[str], max_age: int
+    ) -> LLMRecipe | None:
+        """
+        Get an extracted recipe that was cached under any of the keys at most
+        max_age seconds ago.
+
+        Returns:
+            The recipe, or None if none is cached.
+        """
+        result = await self._run_query(
+            f"SELECT Recipe FROM ExtractionCache WHERE CacheKey IN ({', '.join(['%s'] * len(cache_keys))}) AND CreatedAt > DATE_SUB(NOW(), INTERVAL %s SECOND) ORDER BY CreatedAt DESC LIMIT 1",
+            (*cache_keys, max_age),
+        )
+        if not result:
+            return None
+        try:
+            return LLMRecipe.model_validate_json(result[0][0])
+        except ValidationError:
+            # Cached before the recipe model changed.
+            return None
+
+    async def cache_extraction(self, cache_keys: list[str], recipe: LLMRecipe):
+        """Cache an extracted recipe under all of the keys."""
+        recipe_json = recipe.model_dump_json()
+        async with self._transaction() as cursor:
+            await cursor.executemany(
+                "INSERT INTO ExtractionCache (CacheKey, Recipe) VALUES (%s, %s) ON DUPLICATE KEY UPDATE Recipe = VALUES(Recipe), CreatedAt = NOW()",
+                [(cache_key, recipe_json) for cache_key in cache_keys],
+            )
+
     async def close(self):
+        await self.clicks.stop()
         self.pool.close()
         await self.pool.wait_closed()
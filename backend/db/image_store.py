@@ -0,0 +1,77 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from abc import ABC, abstractmethod
+
+
+class ImageStore(ABC):
+    """
+    Stores the bytes of images outside of the database. The database only keeps
+    the storage key of every image.
+    """
+
+    @abstractmethod
+    def key(self, data: bytes) -> str:
+        """Get the storage key that image data is stored under."""
+
+    @abstractmethod
+    async def put(self, data: bytes) -> str:
+        """
+        Store image data.
+
+        Returns:
+            The storage key of the data.
+        """
+
+    @abstractmethod
+    def path(self, key: str) -> str:
+        """Get the path of the file that holds the data of a storage key."""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Delete the data of a storage key, if it exists."""
+
+
+class FileImageStore(ImageStore):
+    """
+    Content-addressed image store on the local filesystem. Every file is named
+    after the SHA-256 of its content, so identical images are stored once.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @staticmethod
+    def key(data: bytes) -> str:
+        """Get the storage key of image data."""
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    async def put(self, data: bytes) -> str:
+        key = self.key(data)
+        await asyncio.to_thread(self._write, self.path(key), data)
+        return key
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so that a file is never read half-written.
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temporary_path, "wb") as f:
+                f.write(data)
+            os.replace(temporary_path, path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    async def delete(self, key: str):
+        try:
+            await asyncio.to_thread(os.remove, self.path(key))
+        except FileNotFoundError:
+            pass
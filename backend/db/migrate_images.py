@@ -0,0 +1,29 @@
+"""
+Move the data of all images that are still stored in the database to the image
+store. Run from the backend directory after applying
+db/migrations/003_image_storage_key.sql:
+
+    python -m db.migrate_images
+"""
+
+import asyncio
+
+from db.database_handler import (
+    AsyncDatabaseContextManager,
+    init_database,
+    shutdown_database,
+)
+
+
+async def main():
+    await init_database()
+    try:
+        async with AsyncDatabaseContextManager() as database:
+            count = await database.migrate_images()
+        print(f"Moved {count} images.")
+    finally:
+        await shutdown_database()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
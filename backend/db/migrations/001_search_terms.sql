@@ -0,0 +1,11 @@
+-- Inverted index for the recipe search, maintained by MySQLDatabase on every
+-- recipe write. Fill it once for existing recipes with:
+--     python -m db.build_search_index
+CREATE TABLE SearchTerms (
+    RecipeID INT NOT NULL,
+    Term VARCHAR(64) NOT NULL,
+    Weight INT NOT NULL,
+    PRIMARY KEY (Term, RecipeID),
+    KEY SearchTermsRecipeID (RecipeID),
+    FOREIGN KEY (RecipeID) REFERENCES Recipes (RecipeID) ON DELETE CASCADE
+) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin;
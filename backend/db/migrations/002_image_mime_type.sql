@@ -0,0 +1,4 @@
+-- MIME type of every image, stored at upload so that serving an image needs no
+-- decode. Images uploaded before this column existed are WebP.
+ALTER TABLE Images ADD COLUMN MimeType VARCHAR(64) NULL;
+UPDATE Images SET MimeType = 'image/webp' WHERE MimeType IS NULL;
@@ -0,0 +1,9 @@
+-- Image data moves from the Image BLOB column to the image store (see
+-- db/image_store.py); Images only keeps the storage key. Move the data of
+-- existing images with:
+--     python -m db.migrate_images
+-- Images that are not moved yet are moved on their first request.
+ALTER TABLE Images
+    ADD COLUMN StorageKey CHAR(64) NULL,
+    ADD KEY ImagesStorageKey (StorageKey),
+    MODIFY Image LONGBLOB NULL;
@@ -0,0 +1,11 @@
+-- Smaller variants of every image, created at upload and served for the
+-- width parameter of /image/{image_id}. Images uploaded before this table
+-- existed have no variants and are served in full size.
+CREATE TABLE ImageVariants (
+    ImageID INT NOT NULL,
+    Width INT NOT NULL,
+    StorageKey CHAR(64) NOT NULL,
+    PRIMARY KEY (ImageID, Width),
+    KEY ImageVariantsStorageKey (StorageKey),
+    FOREIGN KEY (ImageID) REFERENCES Images (ImageID) ON DELETE CASCADE
+);
@@ -0,0 +1,16 @@
+-- Recipe extraction jobs, so that submitted imports survive a restart. Jobs
+-- that were running during a restart are picked up again as pending.
+CREATE TABLE ExtractionJobs (
+    JobID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    UserID INT NOT NULL,
+    Kind VARCHAR(16) NOT NULL,
+    Source MEDIUMTEXT NOT NULL,
+    Status VARCHAR(16) NOT NULL,
+    RecipeID INT NULL,
+    Error TEXT NULL,
+    CreatedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UpdatedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    KEY ExtractionJobsStatus (Status),
+    FOREIGN KEY (UserID) REFERENCES Users (UserID) ON DELETE CASCADE,
+    FOREIGN KEY (RecipeID) REFERENCES Recipes (RecipeID) ON DELETE SET NULL
+);
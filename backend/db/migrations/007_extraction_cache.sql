@@ -0,0 +1,11 @@
+-- Recipes extracted by the LLM, keyed by the SHA-256 of the model, the kind of
+-- source and the normalized URL or the hash of the cleaned text (see
+-- services/extraction_cache.py). Entries older than extraction_cache_ttl
+-- are ignored and replaced on the next extraction.
+CREATE TABLE ExtractionCache (
+    CacheKey CHAR(64) NOT NULL PRIMARY KEY,
+    Recipe MEDIUMTEXT NOT NULL,
+    CreatedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE ExtractionJobs ADD COLUMN UseCache BOOLEAN NOT NULL DEFAULT TRUE;
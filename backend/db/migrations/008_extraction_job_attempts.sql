@@ -0,0 +1,3 @@
+-- How often a job was started. Jobs that were interrupted by restarts this
+-- often are marked as failed instead of being run again.
+ALTER TABLE ExtractionJobs ADD COLUMN Attempts INT NOT NULL DEFAULT 0;
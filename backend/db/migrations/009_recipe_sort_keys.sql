@@ -0,0 +1,10 @@
+-- Sort keys of the recipe listings that are never NULL, with an index each,
+-- so that keyset pagination seeks in the index instead of sorting all
+-- recipes. Titles are sorted and compared by their first 255 characters.
+ALTER TABLE Recipes
+    ADD COLUMN SortClicks INT AS (COALESCE(Clicks, 0)) STORED NOT NULL,
+    ADD COLUMN SortTitle VARCHAR(255) AS (COALESCE(LEFT(Title, 255), '')) STORED NOT NULL,
+    ADD COLUMN SortCookingTime INT AS (COALESCE(CookingTime, 0)) STORED NOT NULL,
+    ADD KEY RecipesSortClicks (SortClicks, RecipeID),
+    ADD KEY RecipesSortTitle (SortTitle, RecipeID),
+    ADD KEY RecipesSortCookingTime (SortCookingTime, RecipeID);
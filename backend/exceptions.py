@@ -9,6 +9,18 @@ class UpdateFailedException(Exception):
     """Raised when a resource could not be updated."""
 
 
+class InvalidCursorException(Exception):
+    """Raised when a pagination cursor cannot be used."""
+
+
+class OverloadedException(Exception):
+    """Raised when there is too much work queued to accept more."""
+
+
+class ImageTooLargeException(Exception):
+    """Raised when an image has more pixels than allowed."""
+
+
 class CredentialsException(HTTPException):
     """Raised when the users credentials are invalid"""
 
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor
+
+import metrics
+from exceptions import OverloadedException
+
+
+def _timed(function: Callable, *args):
+    # Runs in the worker, so it can only report wall-clock times back.
+    start = time.time()
+    result = function(*args)
+    return start, time.time() - start, result
+
+
+class BoundedExecutor:
+    """
+    Runs blocking work off the event loop in an executor and bounds the number
+    of tasks that are queued or running, so that an overloaded executor fails
+    fast instead of piling up requests.
+    """
+
+    def __init__(self, name: str, executor: Executor, max_pending: int):
+        """
+        :param name: Prefix of the executor's metrics.
+        :param executor: The thread or process pool to run the work in.
+        :param max_pending: The maximum number of queued and running tasks.
+        """
+        self.executor = executor
+        self.max_pending = max_pending
+        self._pending = 0
+
+        metrics.Gauge(
+            f"{name}_pending", "Tasks queued or running", lambda: self._pending
+        )
+        self.rejected = metrics.Counter(
+            f"{name}_rejected_total", "Tasks rejected because the queue was full"
+        )
+        self.queue_wait = metrics.Summary(
+            f"{name}_queue_wait_seconds", "Time tasks waited for a worker"
+        )
+        self.processing = metrics.Summary(
+            f"{name}_processing_seconds", "Time tasks ran in a worker"
+        )
+
+    async def run(self, function: Callable, *args):
+        """
+        Run a function in the executor and wait for its result. In a process
+        pool, the function and its arguments must be picklable.
+
+        Raises:
+            OverloadedException: if max_pending tasks are queued or running.
+        """
+        if self._pending >= self.max_pending:
+            self.rejected.inc()
+            raise OverloadedException("Too many tasks are waiting, try again later.")
+        loop = asyncio.get_running_loop()
+        submitted = time.time()
+        future = self.executor.submit(_timed, function, *args)
+        self._pending += 1
+        # The task stays pending until the worker is done with it, even if the
+        # awaiting request is cancelled before.
+        future.add_done_callback(lambda _: self._finished(loop))
+        start, duration, result = await asyncio.wrap_future(future)
+        self.queue_wait.observe(max(start - submitted, 0.0))
+        self.processing.observe(duration)
+        return result
+
+    def _finished(self, loop: asyncio.AbstractEventLoop):
+        # Called in the thread that completed the task.
+        try:
+            loop.call_soon_threadsafe(self._decrement)
+        except RuntimeError:
+            # The loop is already closed.
+            pass
+
+    def _decrement(self):
+        self._pending -= 1
+
+    def shutdown(self):
+        """
+        Cancel the queued tasks and stop the workers once they are idle. Blocks
+        until then, so call it in a thread from async code.
+        """
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,104 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable
+
+SUMMARY_WINDOW = 1024
+
+_registry: dict[str, "Metric"] = {}
+
+
+class Metric(ABC):
+    """
+    Base class of the in-process metrics served by the /metrics endpoint.
+    Registering a name again replaces the earlier metric, so a recreated
+    component reports its own state.
+    """
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        _registry[name] = self
+
+    @abstractmethod
+    def value(self):
+        """Get the current value of the metric."""
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self._value = 0
+
+    def inc(self, amount: float = 1):
+        self._value += amount
+
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge(Metric):
+    """A value that can go up and down, or is read from a function on demand."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        function: Callable[[], float] | None = None,
+    ):
+        super().__init__(name, description)
+        self._value = 0
+        self._function = function
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1):
+        self._value += amount
+
+    def dec(self, amount: float = 1):
+        self._value -= amount
+
+    def value(self) -> float:
+        return self._function() if self._function else self._value
+
+
+class Summary(Metric):
+    """Observations with their count, sum and percentiles of the recent ones."""
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self.count = 0
+        self.sum = 0.0
+        self._recent = deque(maxlen=SUMMARY_WINDOW)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self._recent.append(value)
+
+    def percentile(self, percentile: float) -> float | None:
+        """Get a percentile (0-100) of the recent observations."""
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        index = round(percentile / 100 * (len(ordered) - 1))
+        return ordered[index]
+
+    def value(self) -> dict[str, float | None]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+def snapshot() -> dict:
+    """Get the current value of every registered metric."""
+    return {
+        name: {"description": metric.description, "value": metric.value()}
+        for name, metric in sorted(_registry.items())
+    }
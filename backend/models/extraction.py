@@ -0,0 +1,72 @@
+from enum import StrEnum
+
+from pydantic import BaseModel
+
+
+class ExtractionKindEnum(StrEnum):
+    """Enum for the sources a recipe can be extracted from."""
+
+    URL = "url"
+    TEXT = "text"
+
+
+class ExtractionStatusEnum(StrEnum):
+    """Enum for the states of an extraction job."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ExtractionJob(BaseModel):
+    """A recipe extraction job."""
+
+    id_: int
+    user_id: int
+    kind: ExtractionKindEnum
+    status: ExtractionStatusEnum
+    recipe_id: int | None = None
+    error: str | None = None
+
+
+class ExtractionTask(BaseModel):
+    """The input of a claimed extraction job."""
+
+    id_: int
+    kind: ExtractionKindEnum
+    source: str
+    user_id: int
+    use_cache: bool = True
+
+
+class BulkImport(BaseModel):
+    """The recipe URLs of a bulk import."""
+
+    urls: list[str]
+
+
+class BulkImportResult(BaseModel):
+    """The finished extraction job of a URL in a bulk import."""
+
+    url: str
+    job: ExtractionJob
+
+
+class ExtractionEventEnum(StrEnum):
+    """Enum for the progress events of an extraction job."""
+
+    FETCHED = "fetched"
+    CLEANED = "cleaned"
+    TITLE = "title"
+    INGREDIENTS = "ingredients"
+    STEPS = "steps"
+    SAVED = "saved"
+    FAILED = "failed"
+
+
+class ExtractionEvent(BaseModel):
+    """A progress event of an extraction job, with the data extracted so far."""
+
+    event: ExtractionEventEnum
+    data: dict | None = None
@@ -99,6 +99,13 @@ class RecipeListing(BaseModel):
     cooking_time: int
 
 
+class RecipeListingPage(BaseModel):
+    """A page of recipe listings with the cursor of the following page."""
+
+    recipes: list[RecipeListing]
+    next_cursor: str | None = None
+
+
 class RecipeStep(BaseModel):
     """A recipe step model."""
 
@@ -1,22 +1,77 @@
-import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import Annotated
 
 from db.database import Database
 from db.database_handler import get_database_connection
-from exceptions import NotFoundException
-from fastapi import Depends, HTTPException, Response, UploadFile, status
+from exceptions import (
+    ImageTooLargeException,
+    NotFoundException,
+    OverloadedException,
+)
+from executors import BoundedExecutor
+from fastapi import (
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import FileResponse
 from fastapi.routing import APIRouter
-from services.image_tools import process_image
+from services.image_tools import MIME_TYPE, process_upload
 from models.recipe import ImageID
 from models.user import UserInDB
 from pi_heif import register_heif_opener
-from PIL import Image as PILImage
-from routers.user_router import get_current_active_user
+from PIL import UnidentifiedImageError
+from routers.user_router import get_current_active_user, service_unavailable
+from utils import load_config
 
 register_heif_opener()
 
+CONFIG = load_config()
+
 image_router = APIRouter(tags=["Image"])
 
+# Decoding and encoding images takes long enough to block the event loop, so it
+# runs in worker processes.
+image_executor = BoundedExecutor(
+    "image_processing",
+    ProcessPoolExecutor(
+        max_workers=CONFIG.get("image_workers", 2),
+        initializer=register_heif_opener,
+        # Forking the server process would copy its event loop, threads and
+        # connections into the workers.
+        mp_context=multiprocessing.get_context("forkserver"),
+    ),
+    max_pending=CONFIG.get("image_queue_size", 8),
+)
+# Uploads with more pixels are rejected before they are decoded.
+MAX_IMAGE_PIXELS = CONFIG.get("max_image_pixels", 64_000_000)
+
+# Images are never changed after upload, so a response for an image ID is valid
+# forever.
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def image_etag(image_id: int, width: int | None = None) -> str:
+    """Get the strong ETag of an image, or of its variant for a width."""
+    if width is None:
+        return f'"image-{image_id}"'
+    return f'"image-{image_id}-{width}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check if an If-None-Match header matches the given ETag."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
+
 
 @image_router.post("/image/create")
 async def create_image(
@@ -24,29 +79,62 @@ async def create_image(
     database: Annotated[Database, Depends(get_database_connection)],
     _: Annotated[UserInDB, Depends(get_current_active_user)],
 ) -> ImageID:
-    image = PILImage.open(image.file)
-    data = process_image(image)
+    upload = await image.read()
+    try:
+        data, variants = await image_executor.run(
+            process_upload, upload, MAX_IMAGE_PIXELS
+        )
+    except OverloadedException as e:
+        raise service_unavailable(e) from e
+    except ImageTooLargeException as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        ) from e
+    except UnidentifiedImageError as e:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="The file is not a supported image.",
+        ) from e
 
-    id_ = await database.create_image(data)
+    try:
+        # Waits for the locks of the image files, which can time out.
+        id_ = await database.create_image(data, MIME_TYPE, variants)
+    except OverloadedException as e:
+        raise service_unavailable(e) from e
 
     return ImageID(id_=id_)
 
 
 @image_router.get("/image/{image_id}")
 async def get_image(
-    image_id: int, database: Annotated[Database, Depends(get_database_connection)]
+    image_id: int,
+    database: Annotated[Database, Depends(get_database_connection)],
+    width: Annotated[
+        int | None,
+        Query(
+            title="Width",
+            description="Return the smallest variant of the image that is at least this wide",
+            gt=0,
+            example=360,
+        ),
+    ] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
 ) -> Response:
 
+    etag = image_etag(image_id, width)
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
     try:
-        data = await database.get_image(image_id)
-        img = PILImage.open(io.BytesIO(data))
-        return Response(content=data, media_type=f"image/{img.format.lower()}")
+        if etag_matches(if_none_match, etag):
+            # Only check that the image still exists, without loading it.
+            await database.get_image_mime_type(image_id)
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        path, mime_type = await database.get_image(image_id, width)
+        return FileResponse(path, media_type=mime_type, headers=headers)
     except NotFoundException as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
-        ) from e
+    except OverloadedException as e:
+        raise service_unavailable(e) from e
 
 
 @image_router.get("/image/recipe/{recipe_id}")
@@ -68,3 +156,5 @@ async def delete_image(
         await database.delete_image(image_id)
     except NotFoundException as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+    except OverloadedException as e:
+        raise service_unavailable(e) from e
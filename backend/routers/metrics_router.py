@@ -0,0 +1,9 @@
+import metrics
+from fastapi.routing import APIRouter
+
+metrics_router = APIRouter(tags=["Metrics"])
+
+
+@metrics_router.get("/metrics")
+async def get_metrics() -> dict:
+    return metrics.snapshot()
@@ -1,62 +1,235 @@
-from typing import Annotated
+import asyncio
+import json
+from typing import Annotated, AsyncIterator
 
 from db.database import Database
 from db.database_handler import get_database_connection
-from services.extractor import extract_from_url, extract_from_text
-from fastapi import APIRouter, Depends, HTTPException
-from models.recipe import LLMRecipe, Recipe, RecipeBase
+from exceptions import NotFoundException
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from models.extraction import (
+    BulkImport,
+    BulkImportResult,
+    ExtractionEvent,
+    ExtractionJob,
+    ExtractionKindEnum,
+    ExtractionStatusEnum,
+)
+from models.recipe import Recipe
 from models.user import UserInDB
 from routers.user_router import get_current_active_user
+from services.extraction_jobs import ExtractionJobs, get_extraction_jobs
+from utils import load_config
+
+CONFIG = load_config()
 
 parser_router = APIRouter(tags=["Parser"])
 
+BULK_IMPORT_MAX_URLS = CONFIG.get("bulk_import_max_urls", 100)
+# Jobs of one bulk import that are queued or running at the same time, so that
+# a bulk import does not hold up the extractions of other users.
+BULK_IMPORT_CONCURRENCY = CONFIG.get("bulk_import_concurrency", 2)
+# Seconds between comments that keep an idle event stream open through proxies.
+KEEP_ALIVE_INTERVAL = 15
+
+UseCacheQuery = Annotated[
+    bool,
+    Query(
+        title="Use cache",
+        description="Reuse an earlier extraction of the same source, set to false to extract it again",
+    ),
+]
+
 
-async def process_llm_model(
-    database: Database, user: UserInDB, recipe: LLMRecipe
-) -> tuple[int, RecipeBase]:
+async def submit_extraction(
+    database: Database,
+    jobs: ExtractionJobs,
+    user: UserInDB,
+    kind: ExtractionKindEnum,
+    source: str,
+    use_cache: bool,
+) -> ExtractionJob:
     """
-    Process the LLM model output and save it to the database.
-    :param database: The database connection.
-    :param recipe: The recipe object containing the extracted information.
+    Queue a recipe extraction. The extracted recipe is saved to the database
+    by a background worker.
+    :param source: The URL or text to extract the recipe from.
+    :param use_cache: Whether a cached extraction of the same source can be used.
     """
-    recipe = RecipeBase.model_validate(recipe)
+    job_id = await jobs.submit(user.id_, kind, source, use_cache)
+    return await database.get_extraction_job(job_id)
+
+
+async def stream_bulk_import(
+    database: Database,
+    jobs: ExtractionJobs,
+    user: UserInDB,
+    urls: list[str],
+    use_cache: bool,
+) -> AsyncIterator[str]:
+    """
+    Extract the recipes of all URLs and yield each finished job as a line of
+    JSON, in the order the jobs finish. At most BULK_IMPORT_CONCURRENCY jobs
+    of the import are queued at a time.
+    """
+    semaphore = asyncio.Semaphore(BULK_IMPORT_CONCURRENCY)
+
+    async def run(url: str) -> tuple[str, int]:
+        async with semaphore:
+            job_id = await jobs.run(user.id_, ExtractionKindEnum.URL, url, use_cache)
+        return url, job_id
+
+    tasks = [asyncio.create_task(run(url)) for url in urls]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            url, job_id = await finished
+            job = await database.get_extraction_job(job_id)
+            yield BulkImportResult(url=url, job=job).model_dump_json() + "\n"
+    finally:
+        # The queued jobs of a closed connection still finish in the
+        # background, the URLs that were not queued yet are not imported.
+        for task in tasks:
+            task.cancel()
+
+
+async def server_sent_events(
+    events: AsyncIterator[ExtractionEvent | None],
+) -> AsyncIterator[str]:
+    """Format extraction events as Server-Sent Events, None as a keep-alive."""
+    async for event in events:
+        if event is None:
+            yield ": keep-alive\n\n"
+        else:
+            yield f"event: {event.event}\ndata: {json.dumps(event.data)}\n\n"
 
-    return await database.create_recipe(recipe, user), recipe
+
+async def get_own_extraction_job(
+    database: Database, user: UserInDB, job_id: int
+) -> ExtractionJob:
+    try:
+        job = await database.get_extraction_job(job_id)
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    if job.user_id != user.id_ and not user.is_admin:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Extraction job with id {job_id} not found in database.",
+        )
+    return job
 
 
-@parser_router.post("/parse-external-recipe")
+@parser_router.post("/parse-external-recipe", status_code=status.HTTP_202_ACCEPTED)
 async def parse_external_recipe(
     url: str,
     user: Annotated[UserInDB, Depends(get_current_active_user)],
     database: Annotated[Database, Depends(get_database_connection)],
-) -> Recipe:
+    jobs: Annotated[ExtractionJobs, Depends(get_extraction_jobs)],
+    use_cache: UseCacheQuery = True,
+) -> ExtractionJob:
     if not url:
         raise HTTPException(status_code=400, detail="URL is required")
 
-    try:
-        llm_recipe = extract_from_url(url)
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
+    return await submit_extraction(
+        database, jobs, user, ExtractionKindEnum.URL, url, use_cache
+    )
 
-    id_, recipe = await process_llm_model(database, user, llm_recipe)
 
-    return Recipe(id_=id_, **recipe.model_dump())
+@parser_router.post(
+    "/parse-external-recipes",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def parse_external_recipes(
+    bulk_import: BulkImport,
+    user: Annotated[UserInDB, Depends(get_current_active_user)],
+    database: Annotated[Database, Depends(get_database_connection)],
+    jobs: Annotated[ExtractionJobs, Depends(get_extraction_jobs)],
+    use_cache: UseCacheQuery = True,
+) -> StreamingResponse:
+    """
+    Import the recipes of many URLs. Responds with one BulkImportResult per
+    line as soon as the extraction of its URL finished.
+    """
+    urls = list(dict.fromkeys(url.strip() for url in bulk_import.urls if url.strip()))
+    if not urls:
+        raise HTTPException(status_code=400, detail="URLs are required")
+    if len(urls) > BULK_IMPORT_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BULK_IMPORT_MAX_URLS} URLs can be imported at once",
+        )
+
+    return StreamingResponse(
+        stream_bulk_import(database, jobs, user, urls, use_cache),
+        media_type="application/x-ndjson",
+    )
 
 
-@parser_router.post("/parse-recipe-text")
+@parser_router.post("/parse-recipe-text", status_code=status.HTTP_202_ACCEPTED)
 async def parse_recipe_text(
     text: str,
     user: Annotated[UserInDB, Depends(get_current_active_user)],
     database: Annotated[Database, Depends(get_database_connection)],
-) -> Recipe:
+    jobs: Annotated[ExtractionJobs, Depends(get_extraction_jobs)],
+    use_cache: UseCacheQuery = True,
+) -> ExtractionJob:
     if not text:
         raise HTTPException(status_code=400, detail="Text is required")
 
+    return await submit_extraction(
+        database, jobs, user, ExtractionKindEnum.TEXT, text, use_cache
+    )
+
+
+@parser_router.get("/parse-jobs/{job_id}")
+async def get_extraction_job(
+    job_id: int,
+    user: Annotated[UserInDB, Depends(get_current_active_user)],
+    database: Annotated[Database, Depends(get_database_connection)],
+) -> ExtractionJob:
+    return await get_own_extraction_job(database, user, job_id)
+
+
+@parser_router.get("/parse-jobs/{job_id}/recipe")
+async def get_extracted_recipe(
+    job_id: int,
+    user: Annotated[UserInDB, Depends(get_current_active_user)],
+    database: Annotated[Database, Depends(get_database_connection)],
+) -> Recipe:
+    job = await get_own_extraction_job(database, user, job_id)
+    if job.status == ExtractionStatusEnum.FAILED:
+        raise HTTPException(status_code=422, detail=job.error)
+    if job.status != ExtractionStatusEnum.DONE:
+        raise HTTPException(
+            status_code=409, detail=f"Extraction job {job_id} is {job.status}"
+        )
+    if job.recipe_id is None:
+        raise HTTPException(status_code=404, detail="The recipe was deleted")
+
     try:
-        llm_recipe = extract_from_text(text)
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
+        return await database.get_recipe(job.recipe_id)
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
 
-    id_, recipe = await process_llm_model(database, user, llm_recipe)
 
-    return Recipe(id_=id_, **recipe.model_dump())
+@parser_router.get(
+    "/parse-jobs/{job_id}/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_extraction_events(
+    job_id: int,
+    user: Annotated[UserInDB, Depends(get_current_active_user)],
+    database: Annotated[Database, Depends(get_database_connection)],
+    jobs: Annotated[ExtractionJobs, Depends(get_extraction_jobs)],
+) -> StreamingResponse:
+    """
+    Stream the progress of an extraction job as Server-Sent Events: fetched,
+    cleaned, title, ingredients and steps as soon as the LLM streamed them,
+    and finally saved or failed.
+    """
+    await get_own_extraction_job(database, user, job_id)
+    return StreamingResponse(
+        server_sent_events(jobs.events(job_id, KEEP_ALIVE_INTERVAL)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
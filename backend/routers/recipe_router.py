@@ -2,8 +2,12 @@ from typing import Annotated
 
 from db.database import Database, SortByEnum, SortOrderEnum
 from db.database_handler import AsyncDatabaseContextManager, get_database_connection
-from exceptions import NotFoundException, UpdateFailedException
-from fastapi import BackgroundTasks, Depends, HTTPException, Query, status
+from exceptions import (
+    InvalidCursorException,
+    NotFoundException,
+    UpdateFailedException,
+)
+from fastapi import BackgroundTasks, Depends, HTTPException, Query, Response, status
 from fastapi.routing import APIRouter
 from fastapi.security import OAuth2PasswordBearer
 from models.recipe import CategoryEnum, Recipe, RecipeBase, RecipeListing
@@ -16,6 +20,25 @@ recipe_router = APIRouter(tags=["Recipe"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+async def list_recipes(
+    database: Database, response: Response, **kwargs
+) -> list[RecipeListing]:
+    """Get a page of recipes and pass its next cursor in a response header."""
+    try:
+        recipe_page = await database.get_all_recipes(**kwargs)
+    except InvalidCursorException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+
+    if recipe_page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = recipe_page.next_cursor
+    return recipe_page.recipes
+
+
 async def remove_unused_images():
     async with AsyncDatabaseContextManager() as database:
         await database.delete_unused_images()
@@ -52,6 +75,7 @@ async def get_recipe(
 @recipe_router.get("/recipe/all")
 async def get_all_recipes(
     database: Annotated[Database, Depends(get_database_connection)],
+    response: Response,
     limit: Annotated[
         int,
         Query(
@@ -79,15 +103,29 @@ async def get_all_recipes(
             example=SortOrderEnum.DESC,
         ),
     ] = SortOrderEnum.DESC,
+    cursor: Annotated[
+        str | None,
+        Query(
+            title="Cursor",
+            description=f"Continue after the page that returned this value in the {NEXT_CURSOR_HEADER} header",
+        ),
+    ] = None,
 ) -> list[RecipeListing]:
-    return await database.get_all_recipes(
-        limit=limit, page=page, sort_by=sort_by, sort_order=sort_order
+    return await list_recipes(
+        database,
+        response,
+        limit=limit,
+        page=page,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        cursor=cursor,
     )
 
 
 @recipe_router.get("/recipe/filtered")
 async def get_filtered_recipes(
     database: Annotated[Database, Depends(get_database_connection)],
+    response: Response,
     categories: Annotated[
         list[CategoryEnum],
         Query(
@@ -131,14 +169,24 @@ async def get_filtered_recipes(
             example=SortOrderEnum.DESC,
         ),
     ] = SortOrderEnum.DESC,
+    cursor: Annotated[
+        str | None,
+        Query(
+            title="Cursor",
+            description=f"Continue after the page that returned this value in the {NEXT_CURSOR_HEADER} header",
+        ),
+    ] = None,
 ) -> list[RecipeListing]:
-    return await database.get_all_recipes(
+    return await list_recipes(
+        database,
+        response,
         limit=limit,
         page=page,
         search_string=search,
         filter_categories=categories,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
     )
 
 
@@ -1,15 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 import bcrypt
 from db.database import Database
 from db.database_handler import get_database_connection
-from exceptions import CredentialsException, NotFoundException
+from exceptions import CredentialsException, NotFoundException, OverloadedException
+from executors import BoundedExecutor
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from models.user import Authorization, NewUser, UserInDB
-from utils import load_credentials
+from utils import load_config, load_credentials
+
+CONFIG = load_config()
 
 user_router = APIRouter(tags=["User"])
 
@@ -19,13 +23,37 @@ SECRET_KEY = load_credentials()["secret_key"]
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 360
 
+# A bcrypt round takes long enough to block the event loop, so it runs in worker
+# threads; bcrypt releases the GIL while hashing.
+password_executor = BoundedExecutor(
+    "password_hashing",
+    ThreadPoolExecutor(
+        max_workers=CONFIG.get("password_workers", 2),
+        thread_name_prefix="password_hashing",
+    ),
+    max_pending=CONFIG.get("password_queue_size", 16),
+)
+
+
+def service_unavailable(e: OverloadedException) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": "1"},
+    )
 
-def verify_password(plain_password, hashed_password) -> bool:
-    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
 
+async def verify_password(plain_password, hashed_password) -> bool:
+    return await password_executor.run(
+        bcrypt.checkpw, plain_password.encode(), hashed_password.encode()
+    )
 
-def get_password_hash(password: str) -> str:
-    return str(bcrypt.hashpw(password.encode(), bcrypt.gensalt()), encoding="utf-8")
+
+async def get_password_hash(password: str) -> str:
+    hashed_password = await password_executor.run(
+        bcrypt.hashpw, password.encode(), bcrypt.gensalt()
+    )
+    return str(hashed_password, encoding="utf-8")
 
 
 async def authenticate_user(
@@ -34,7 +62,7 @@ async def authenticate_user(
     try:
         user = await database.get_user_by_username(username)
 
-        return user if verify_password(password, user.hashed_password) else None
+        return user if await verify_password(password, user.hashed_password) else None
 
     except NotFoundException:
         return None
@@ -79,7 +107,10 @@ async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     database: Annotated[Database, Depends(get_database_connection)],
 ) -> Authorization:
-    user = await authenticate_user(database, form_data.username, form_data.password)
+    try:
+        user = await authenticate_user(database, form_data.username, form_data.password)
+    except OverloadedException as e:
+        raise service_unavailable(e) from e
     if not user:
         raise CredentialsException()
 
@@ -109,7 +140,10 @@ async def create_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="You do not have permission to create users",
         )
-    hashed_password = get_password_hash(new_user.password)
+    try:
+        hashed_password = await get_password_hash(new_user.password)
+    except OverloadedException as e:
+        raise service_unavailable(e) from e
     try:
         if await database.create_user(
             new_user.username, hashed_password, new_user.is_admin
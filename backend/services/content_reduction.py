@@ -0,0 +1,130 @@
+import re
+
+from bs4 import BeautifulSoup, Tag
+from utils import load_config
+
+CONFIG = load_config()
+
+# Upper bound of tokens of page text sent to the LLM.
+TOKEN_BUDGET = CONFIG.get("extraction_token_budget", 4000)
+# Rough number of characters per token, for German and English text with
+# common tokenizers. Close enough for a budget, and the same for every model.
+CHARS_PER_TOKEN = 4
+
+BOILERPLATE_TAGS = [
+    "script",
+    "style",
+    "head",
+    "noscript",
+    "template",
+    "svg",
+    "iframe",
+    "form",
+    "button",
+    "nav",
+    "aside",
+]
+# Tags that are boilerplate for the page, but not inside the recipe article.
+PAGE_TAGS = ["header", "footer"]
+# Class and id words of blocks that are not part of the recipe.
+BOILERPLATE_NAMES = re.compile(
+    r"(^|[-_\s])(ad|ads|advert\w*|banner|breadcrumbs?|comments?|consent|cookies?"
+    r"|footer|menu|nav\w*|newsletter|popup|promo\w*|related|share|sidebar|social"
+    r"|sponsored|teaser)($|[-_\s])",
+    re.IGNORECASE,
+)
+# Blocks that likely hold the recipe, in order of preference.
+MAIN_BLOCKS = (
+    {"itemtype": re.compile(r"schema\.org/Recipe$")},
+    {"class_": re.compile("recipe", re.IGNORECASE)},
+    {"id": re.compile("recipe", re.IGNORECASE)},
+    {"name": "article"},
+    {"name": "main"},
+)
+# A main block with less text than this share of the page is likely a teaser.
+MIN_MAIN_SHARE = 0.2
+# Blocks that hold the content of a page, so that no block around them is
+# boilerplate, whatever its class or id says.
+CONTENT_BLOCKS = (
+    {"name": ["article", "main"]},
+    {"itemtype": re.compile(r"schema\.org/Recipe$")},
+)
+# A block with more than this share of the page text is a page wrapper, not
+# boilerplate.
+MAX_BOILERPLATE_SHARE = 0.5
+# A reduction to less than this share of the page text likely cut the recipe,
+# so the whole page text is used instead.
+MIN_REDUCED_SHARE = 0.05
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _is_boilerplate(tag: Tag, page_length: int) -> bool:
+    if tag.name in ("html", "body"):
+        return False
+    names = " ".join([*tag.get("class", []), tag.get("id", "")])
+    if not names or not BOILERPLATE_NAMES.search(names):
+        return False
+    # Page wrappers such as <div class="site has-sidebar"> hold the content.
+    if any(tag.find(**query) for query in CONTENT_BLOCKS):
+        return False
+    return len(tag.get_text(strip=True)) <= page_length * MAX_BOILERPLATE_SHARE
+
+
+def _main_block(body: Tag) -> Tag:
+    # The largest preferred block that holds a fair share of the page text.
+    page_length = len(body.get_text(strip=True))
+    for query in MAIN_BLOCKS:
+        blocks = body.find_all(**query)
+        if not blocks:
+            continue
+        block = max(blocks, key=lambda tag: len(tag.get_text(strip=True)))
+        if len(block.get_text(strip=True)) >= page_length * MIN_MAIN_SHARE:
+            return block
+    return body
+
+
+def _lines(block: Tag) -> str:
+    lines = []
+    for line in block.get_text(separator="\n", strip=True).splitlines():
+        line = " ".join(line.split())
+        # Repeated lines are mostly buttons and labels.
+        if line and line not in lines[-20:]:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _truncate(text: str, token_budget: int) -> str:
+    max_length = token_budget * CHARS_PER_TOKEN
+    if len(text) <= max_length:
+        return text
+    cut = text.rfind("\n", 0, max_length)
+    return text[: cut if cut > 0 else max_length]
+
+
+def reduce_content(html: str, token_budget: int = TOKEN_BUDGET) -> str:
+    """
+    Reduce a page to the text of its recipe: keep the main recipe block,
+    drop navigation, comments, ads and related content, and cut the text
+    to the token budget. If that leaves next to nothing of the page, the
+    whole page text is cut to the budget instead.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    page_text = _lines(soup)
+    page_length = len(soup.get_text(strip=True))
+    for tag in soup(PAGE_TAGS):
+        if not tag.decomposed and tag.find_parent(["article", "main"]) is None:
+            tag.decompose()
+    for tag in soup.find_all(True):
+        if not tag.decomposed and _is_boilerplate(tag, page_length):
+            tag.decompose()
+
+    text = _lines(_main_block(soup.body or soup))
+    if len(text) < page_length * MIN_REDUCED_SHARE:
+        text = page_text
+    return _truncate(text, token_budget)
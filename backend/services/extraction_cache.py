@@ -0,0 +1,88 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import metrics
+from clients import llm
+from db.database import Database
+from models.extraction import ExtractionKindEnum
+from models.recipe import LLMRecipe
+
+# Query parameters that only track where a visitor came from.
+TRACKING_PARAMETERS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so that links to the same page compare equal: lowercase
+    scheme and host, no default port, fragment or tracking parameters, sorted
+    query parameters and no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").removeprefix("www.")
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host += f":{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.startswith("utm_") and key not in TRACKING_PARAMETERS
+    )
+    return urlunsplit((scheme, host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+class ExtractionCache:
+    """
+    Stores extracted recipes in the database, keyed by the configured
+    extraction models, the kind of source and either the normalized URL or
+    the extracted text. The key covers the whole list of models, the primary
+    one and its fallbacks, because any of them may have produced a recipe, so
+    changing any of them starts a new cache.
+    """
+
+    def __init__(self, database: Database, ttl: int):
+        """
+        :param database: Stores the cached recipes.
+        :param ttl: Seconds after which a cached recipe is extracted again.
+        """
+        self.database = database
+        self.ttl = ttl
+        self.hits = metrics.Counter(
+            "extraction_cache_hits_total", "Extractions served from the cache"
+        )
+        self.misses = metrics.Counter(
+            "extraction_cache_misses_total", "Extractions that called the LLM"
+        )
+        metrics.Gauge(
+            "extraction_cache_hit_ratio",
+            "Share of cache lookups that were served from the cache",
+            lambda: self.hits.value() / max(self.hits.value() + self.misses.value(), 1),
+        )
+
+    @staticmethod
+    def _key(kind: ExtractionKindEnum, value: str) -> str:
+        models = ",".join([llm.MODEL, *llm.FALLBACK_MODELS])
+        return hashlib.sha256(f"{models}\n{kind}\n{value}".encode()).hexdigest()
+
+    @staticmethod
+    def url_key(url: str) -> str:
+        """Get the cache key of a recipe URL."""
+        return ExtractionCache._key(ExtractionKindEnum.URL, normalize_url(url))
+
+    @staticmethod
+    def text_key(kind: ExtractionKindEnum, text: str) -> str:
+        """Get the cache key of the cleaned text a recipe is extracted from."""
+        return ExtractionCache._key(kind, hashlib.sha256(text.encode()).hexdigest())
+
+    async def get(self, *keys: str) -> LLMRecipe | None:
+        """Get a cached recipe stored under any of the keys."""
+        recipe = await self.database.get_cached_extraction(list(keys), self.ttl)
+        if recipe is None:
+            self.misses.inc()
+        else:
+            self.hits.inc()
+        return recipe
+
+    async def put(self, recipe: LLMRecipe, *keys: str):
+        """Cache a recipe under all of the keys."""
+        await self.database.cache_extraction(list(keys), recipe)
@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator
+
+import metrics
+from db.database import Database
+from models.extraction import (
+    ExtractionEvent,
+    ExtractionEventEnum,
+    ExtractionKindEnum,
+    ExtractionStatusEnum,
+    ExtractionTask,
+)
+from models.recipe import RecipeBase
+from services.extraction_cache import ExtractionCache
+from services.extraction_progress import ExtractionProgress
+from services.extractor import extract_from_text, extract_from_url
+
+JOB_DURATION = metrics.Summary(
+    "extraction_job_duration_seconds", "Time it takes to run an extraction job"
+)
+FAILED_JOBS = metrics.Counter("extraction_jobs_failed_total", "Failed extraction jobs")
+
+FINAL_EVENTS = {ExtractionEventEnum.SAVED, ExtractionEventEnum.FAILED}
+
+EXTRACTORS = {
+    ExtractionKindEnum.URL: extract_from_url,
+    ExtractionKindEnum.TEXT: extract_from_text,
+}
+
+
+class ExtractionJobs:
+    """
+    Runs recipe extractions in the background. Jobs are stored in the database
+    and run by a fixed number of workers, which bounds the concurrent LLM calls.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        workers: int,
+        cache: ExtractionCache,
+        max_attempts: int,
+    ):
+        """
+        :param database: Stores the jobs and the extracted recipes.
+        :param workers: The maximum number of jobs that run at the same time.
+        :param cache: Caches the results of the extractions.
+        :param max_attempts: The number of times a job is started before it
+            counts as failed, if restarts keep interrupting it.
+        """
+        self.database = database
+        self.workers = workers
+        self.cache = cache
+        self.max_attempts = max_attempts
+        self._queue: asyncio.Queue[int] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._waiters: dict[int, asyncio.Future] = {}
+        # The events of running jobs so far, and the queues of their listeners.
+        self._events: dict[int, list[ExtractionEvent]] = {}
+        self._listeners: dict[int, set[asyncio.Queue]] = {}
+        metrics.Gauge(
+            "extraction_jobs_queued",
+            "Extraction jobs waiting for a worker",
+            self._queue.qsize,
+        )
+
+    async def submit(
+        self,
+        user_id: int,
+        kind: ExtractionKindEnum,
+        source: str,
+        use_cache: bool = True,
+    ) -> int:
+        """
+        Create an extraction job and queue it.
+
+        Returns:
+            The ID of the job.
+        """
+        job_id = await self.database.create_extraction_job(
+            user_id, kind, source, use_cache
+        )
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    async def run(
+        self,
+        user_id: int,
+        kind: ExtractionKindEnum,
+        source: str,
+        use_cache: bool = True,
+    ) -> int:
+        """
+        Create an extraction job, queue it and wait until it is finished.
+
+        Returns:
+            The ID of the job.
+        """
+        job_id = await self.database.create_extraction_job(
+            user_id, kind, source, use_cache
+        )
+        finished = self._waiters[job_id] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(job_id)
+        try:
+            await finished
+        finally:
+            self._waiters.pop(job_id, None)
+        return job_id
+
+    async def events(
+        self, job_id: int, idle_timeout: float
+    ) -> AsyncIterator[ExtractionEvent | None]:
+        """
+        Yield the progress events of a job, starting with those it already
+        had, until it is saved or failed. A finished job yields only its final
+        event. Yields None after idle_timeout seconds without an event.
+        """
+        queue: asyncio.Queue[ExtractionEvent] = asyncio.Queue()
+        for event in self._events.get(job_id, []):
+            queue.put_nowait(event)
+        self._listeners.setdefault(job_id, set()).add(queue)
+        try:
+            if queue.empty():
+                job = await self.database.get_extraction_job(job_id)
+                if job.status == ExtractionStatusEnum.DONE:
+                    yield ExtractionEvent(
+                        event=ExtractionEventEnum.SAVED,
+                        data={"recipe_id": job.recipe_id},
+                    )
+                    return
+                if job.status == ExtractionStatusEnum.FAILED:
+                    yield ExtractionEvent(
+                        event=ExtractionEventEnum.FAILED, data={"error": job.error}
+                    )
+                    return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), idle_timeout)
+                except TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event.event in FINAL_EVENTS:
+                    return
+        finally:
+            self._listeners[job_id].discard(queue)
+            if not self._listeners[job_id]:
+                del self._listeners[job_id]
+
+    def _publish(self, job_id: int, event: ExtractionEvent):
+        if event.event in FINAL_EVENTS:
+            self._events.pop(job_id, None)
+        else:
+            self._events.setdefault(job_id, []).append(event)
+        for queue in self._listeners.get(job_id, ()):
+            queue.put_nowait(event)
+
+    async def start(self):
+        """Queue the jobs that did not finish before a restart and start the workers."""
+        for job_id in await self.database.get_unfinished_extraction_jobs(
+            self.max_attempts
+        ):
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Stop the workers. Interrupted jobs are run again after the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                task = await self.database.claim_extraction_job(job_id)
+                if task is None:
+                    await self._publish_state(job_id)
+                else:
+                    await self._run(task)
+            except Exception:
+                logging.exception("Failed to run extraction job %s", job_id)
+                await self._publish_state(job_id)
+            self._events.pop(job_id, None)
+            waiter = self._waiters.get(job_id)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(None)
+
+    async def _run(self, task: ExtractionTask):
+        start = time.perf_counter()
+        progress = ExtractionProgress(lambda event: self._publish(task.id_, event))
+        try:
+            llm_recipe = await EXTRACTORS[task.kind](
+                task.source, self.cache, task.use_cache, progress
+            )
+            progress.extracted(llm_recipe.model_dump(mode="json"))
+            user = await self.database.get_user_by_id(task.user_id)
+            recipe_id = await self.database.create_recipe(
+                RecipeBase.model_validate(llm_recipe), user
+            )
+        except ValueError as e:
+            await self._fail(task.id_, str(e))
+        except Exception:
+            logging.exception("Extraction job %s failed", task.id_)
+            await self._fail(task.id_, "The recipe could not be extracted.")
+        else:
+            try:
+                await self.database.finish_extraction_job(task.id_, recipe_id=recipe_id)
+            except Exception:
+                # The recipe is saved, only the job is not marked as done.
+                logging.exception("Failed to finish extraction job %s", task.id_)
+            progress.step(ExtractionEventEnum.SAVED, {"recipe_id": recipe_id})
+        JOB_DURATION.observe(time.perf_counter() - start)
+
+    async def _publish_state(self, job_id: int):
+        # Listeners wait for a final event, so a job that was not run, or whose
+        # run broke off, gets the event of its stored state, or fails.
+        try:
+            job = await self.database.get_extraction_job(job_id)
+        except Exception:
+            logging.exception("Failed to read extraction job %s", job_id)
+            job = None
+        if job is not None and job.status == ExtractionStatusEnum.DONE:
+            self._publish(
+                job_id,
+                ExtractionEvent(
+                    event=ExtractionEventEnum.SAVED,
+                    data={"recipe_id": job.recipe_id},
+                ),
+            )
+        elif job is not None and job.status == ExtractionStatusEnum.FAILED:
+            self._publish(
+                job_id,
+                ExtractionEvent(
+                    event=ExtractionEventEnum.FAILED, data={"error": job.error}
+                ),
+            )
+        else:
+            await self._fail(job_id, "The recipe could not be extracted.")
+
+    async def _fail(self, job_id: int, error: str):
+        FAILED_JOBS.inc()
+        try:
+            await self.database.finish_extraction_job(job_id, error=error)
+        except Exception:
+            logging.exception("Failed to mark extraction job %s as failed", job_id)
+        finally:
+            self._publish(
+                job_id,
+                ExtractionEvent(
+                    event=ExtractionEventEnum.FAILED, data={"error": error}
+                ),
+            )
+
+
+_jobs: ExtractionJobs | None = None
+
+
+async def init_extraction_jobs(
+    database: Database, workers: int, cache_ttl: int, max_attempts: int
+) -> None:
+    """Start the shared extraction workers (call once at app startup)."""
+    global _jobs
+    if _jobs is None:
+        _jobs = ExtractionJobs(
+            database, workers, ExtractionCache(database, cache_ttl), max_attempts
+        )
+        await _jobs.start()
+
+
+async def shutdown_extraction_jobs() -> None:
+    """Stop the shared extraction workers (call once at app shutdown)."""
+    global _jobs
+    if _jobs is not None:
+        await _jobs.stop()
+        _jobs = None
+
+
+def get_extraction_jobs() -> ExtractionJobs:
+    if _jobs is None:
+        raise RuntimeError("Extraction jobs are not initialized")
+    return _jobs
@@ -0,0 +1,39 @@
+from typing import Callable
+
+from models.extraction import ExtractionEvent, ExtractionEventEnum
+
+# Fields of an extracted recipe that are reported as soon as they are complete.
+FIELD_EVENTS = {
+    "title": ExtractionEventEnum.TITLE,
+    "ingredients": ExtractionEventEnum.INGREDIENTS,
+    "steps": ExtractionEventEnum.STEPS,
+}
+
+
+class ExtractionProgress:
+    """Reports the progress of an extraction, including each completed field."""
+
+    def __init__(self, publish: Callable[[ExtractionEvent], None]):
+        self._publish = publish
+        self._reported: set[str] = set()
+
+    def step(self, event: ExtractionEventEnum, data: dict | None = None):
+        self._publish(ExtractionEvent(event=event, data=data))
+
+    def partial(self, recipe: dict):
+        """
+        Report the complete fields of a partial recipe streamed by the LLM.
+        The fields arrive in order, so all but the last one are complete.
+        """
+        for field in list(recipe)[:-1]:
+            self._field(field, recipe[field])
+
+    def extracted(self, recipe: dict):
+        """Report the fields of the extracted recipe that were not reported yet."""
+        for field, value in recipe.items():
+            self._field(field, value)
+
+    def _field(self, field: str, value):
+        if field in FIELD_EVENTS and field not in self._reported:
+            self._reported.add(field)
+            self.step(FIELD_EVENTS[field], {field: value})
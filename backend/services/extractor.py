@@ -1,68 +1,155 @@
+import asyncio
+import json
 import logging
 
-import requests
-from bs4 import BeautifulSoup
+import metrics
 from clients import llm
+from clients.page_fetcher import get_page_fetcher
+from models.extraction import ExtractionEventEnum, ExtractionKindEnum
 from models.recipe import LLMRecipe
+from services.content_reduction import estimate_tokens, reduce_content
+from services.extraction_cache import ExtractionCache
+from services.extraction_progress import ExtractionProgress
+from services.structured_data import compact, find_recipe_data, to_llm_recipe
 
 logging.getLogger().setLevel(logging.INFO)
 
-
-def _clean_data(data: str) -> str:
-    # Check if the data is HTML
-    if "<html" in data.lower() and "</html>" in data.lower():
-        soup = BeautifulSoup(data, "html.parser")
-        # Remove script, style, and head tags
-        for tag in soup(["script", "style", "head"]):
-            tag.decompose()
-        # Return cleaned text
-    return soup.get_text(separator=" ", strip=True)
-    return data
+STRUCTURED_RECIPES = metrics.Counter(
+    "extraction_structured_recipes_total",
+    "URL extractions mapped from schema.org data without the LLM",
+)
+STRUCTURED_COMPLETIONS = metrics.Counter(
+    "extraction_structured_completions_total",
+    "URL extractions that sent schema.org data to the LLM instead of the page",
+)
+PAGE_TOKENS = metrics.Summary(
+    "extraction_page_tokens", "Estimated tokens of fetched recipe pages"
+)
+REDUCED_TOKENS = metrics.Summary(
+    "extraction_reduced_tokens", "Estimated tokens of recipe pages sent to the LLM"
+)
+
+
+def _reduce_page(page: str) -> str:
+    # Keeps the recipe text of a page and logs how much of it was cut.
+    text = reduce_content(page)
+    page_tokens, tokens = estimate_tokens(page), estimate_tokens(text)
+    PAGE_TOKENS.observe(page_tokens)
+    REDUCED_TOKENS.observe(tokens)
+    logging.info(
+        f"Reduced page from {len(page)} characters (~{page_tokens} tokens) "
+        f"to {len(text)} characters (~{tokens} tokens)"
+    )
+    return text
+
+
+def _read_page(page: str) -> tuple[LLMRecipe | None, str]:
+    # Returns the recipe mapped from the markup of the page, or else the text
+    # to send to the LLM.
+    recipe_data, language = find_recipe_data(page)
+    model = to_llm_recipe(recipe_data, language) if recipe_data else None
+    if model is not None:
+        STRUCTURED_RECIPES.inc()
+        return model, ""
+    if recipe_data:
+        # The recipe markup is a fraction of the page text, so the LLM only
+        # has to complete, translate and normalize it.
+        STRUCTURED_COMPLETIONS.inc()
+        return None, json.dumps(compact(recipe_data), ensure_ascii=False)
+    return None, _reduce_page(page)
+
+
+async def _extract(
+    prompt: str,
+    kind: ExtractionKindEnum,
+    text: str,
+    cache: ExtractionCache | None,
+    use_cache: bool,
+    progress: ExtractionProgress | None,
+    *cache_keys: str,
+) -> LLMRecipe:
+    # Calls the LLM unless the text was extracted before, and caches the result
+    # under the text and the given keys.
+    on_partial = progress.partial if progress else None
+    if cache is None:
+        return await llm.acall_llm(prompt, text, on_partial=on_partial)
+
+    text_key = cache.text_key(kind, text)
+    model = await cache.get(text_key) if use_cache else None
+    if model is None:
+        model = await llm.acall_llm(prompt, text, on_partial=on_partial)
+    elif not cache_keys:
+        return model
+    await cache.put(model, text_key, *cache_keys)
+    return model
 
 
-def extract_from_url(recipe_url: str) -> LLMRecipe:
+async def extract_from_url(
+    recipe_url: str,
+    cache: ExtractionCache | None = None,
+    use_cache: bool = True,
+    progress: ExtractionProgress | None = None,
+) -> LLMRecipe:
     """
     Extracts recipe information from the provided recipe URL.
     :param recipe_url: The URL of the recipe.
+    :param cache: Caches the extracted recipes by URL and page text.
+    :param use_cache: Whether cached recipes are used, otherwise they are replaced.
+    :param progress: Reports the fetched page and the fields extracted so far.
     :return: A recipe object containing the extracted information.
     """
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/122.0.0.0 Safari/537.36"
-        )
-    }
-    data = requests.get(recipe_url, headers=headers)
-    if data.status_code == 200:
-        text_data = data.text
-
-        if "<html" in text_data.lower():
-            # Clean the data to remove unnecessary HTML tags
-            text_data = _clean_data(text_data)
-
-        model = llm.call_llm(llm.WEB_SCRAPER_PROMPT, text_data)
-
-        if not model.is_a_recipe:
-            raise ValueError("The provided data is not a recipe.")
+    url_key = cache.url_key(recipe_url) if cache else None
+    model = await cache.get(url_key) if cache and use_cache else None
+    if model is None:
+        page = await get_page_fetcher().fetch(recipe_url)
+        if progress:
+            progress.step(ExtractionEventEnum.FETCHED)
+        # Parsing a large page takes a while, keep it off the event loop.
+        model, text_data = await asyncio.to_thread(_read_page, page)
+        if progress:
+            progress.step(ExtractionEventEnum.CLEANED)
+        if model is None:
+            model = await _extract(
+                llm.WEB_SCRAPER_PROMPT,
+                ExtractionKindEnum.URL,
+                text_data,
+                cache,
+                use_cache,
+                progress,
+                *([url_key] if url_key else []),
+            )
 
-        # Add the URL to the recipe
-        model.description += f"\n\nOriginal: {recipe_url}"
+    if not model.is_a_recipe:
+        raise ValueError("The provided data is not a recipe.")
 
-        return model
+    # Add the URL to the recipe
+    model.description = f"{model.description or ''}\n\nOriginal: {recipe_url}".lstrip()
 
-    raise ValueError(
-        f"Failed to fetch recipe data from the URL. {recipe_url} returned HTTP {data.status_code} Body: {data.text}"
-    )
+    return model
 
 
-def extract_from_text(recipe_text: str) -> LLMRecipe:
+async def extract_from_text(
+    recipe_text: str,
+    cache: ExtractionCache | None = None,
+    use_cache: bool = True,
+    progress: ExtractionProgress | None = None,
+) -> LLMRecipe:
     """
     Extracts recipe information from the provided recipe text.
     :param recipe_text: The text of the recipe.
+    :param cache: Caches the extracted recipes by text.
+    :param use_cache: Whether cached recipes are used, otherwise they are replaced.
+    :param progress: Reports the fields extracted so far.
     :return: A recipe object containing the extracted information.
     """
-    model = llm.call_llm(llm.USER_TEXT_PROMPT, recipe_text)
+    model = await _extract(
+        llm.USER_TEXT_PROMPT,
+        ExtractionKindEnum.TEXT,
+        recipe_text,
+        cache,
+        use_cache,
+        progress,
+    )
 
     if not model.is_a_recipe:
         raise ValueError("The provided data is not a recipe.")
@@ -2,24 +2,82 @@
 import io
 from PIL import Image as PILImage
 
+from exceptions import ImageTooLargeException
+
 SIZE = (700, 700)
+# Smaller variants of every image for thumbnails, each fitting in a square of
+# the given size. The full image fits in SIZE.
+VARIANT_SIZES = (160, 360)
+FORMAT = "webp"
+MIME_TYPE = f"image/{FORMAT}"
 
-def resize_image(image: PILImage) -> PILImage:
-    """Resize the image to the given size."""
-    if image.size[0] > image.size[1]:
-        new_width = SIZE[0]
-        new_height = int(SIZE[0] * image.size[1] / image.size[0])
+# Scale large images down by an integer factor first, so that only the last
+# step up to 3x the target size uses the slower resampling filter.
+REDUCING_GAP = 3.0
+
+def fit_size(
+    image_size: tuple[int, int], size: tuple[int, int] = SIZE
+) -> tuple[int, int]:
+    """Get the size of an image scaled to fit the given size."""
+    if image_size[0] > image_size[1]:
+        new_width = size[0]
+        new_height = int(size[0] * image_size[1] / image_size[0])
     else:
-        new_height = SIZE[1]
-        new_width = int(SIZE[1] * image.size[0] / image.size[1])
-    return image.resize((new_width, new_height))
+        new_height = size[1]
+        new_width = int(size[1] * image_size[0] / image_size[1])
+    return new_width, new_height
 
 
-def process_image(image: PILImage) -> bytes:
-    """Process the image to fit the given size."""
+def resize_image(image: PILImage, size: tuple[int, int] = SIZE) -> PILImage:
+    """Resize the image to the given size."""
+    return image.resize(fit_size(image.size, size), reducing_gap=REDUCING_GAP)
+
+
+def _encode_image(image: PILImage) -> bytes:
+    with io.BytesIO() as output:
+        image.save(output, format=FORMAT, optimize=True, quality=80)
+        return output.getvalue()
+
+
+def process_image(image: PILImage) -> tuple[bytes, dict[int, bytes]]:
+    """
+    Process the image to fit the given size and convert it to MIME_TYPE.
+    Returns the full image and its variants by size. The image is decoded once
+    and every variant is scaled down from the next larger one.
+    """
     
     image = resize_image(image)
+    data = _encode_image(image)
 
-    with io.BytesIO() as output:
-        image.save(output, format="webp", optimize=True, quality=80)
-        return output.getvalue()
\ No newline at end of file
+    variants = {}
+    for size in sorted(VARIANT_SIZES, reverse=True):
+        image = resize_image(image, (size, size))
+        variants[size] = _encode_image(image)
+    return data, variants
+
+
+def process_upload(
+    upload: bytes, max_pixels: int
+) -> tuple[bytes, dict[int, bytes]]:
+    """
+    Decode an uploaded image file and process it, see `process_image`.
+    The size is checked from the file header before anything is decoded, and
+    formats that support it (JPEG) are scaled down while decoding.
+
+    Raises:
+        ImageTooLargeException: if the image has more than max_pixels pixels.
+        PIL.UnidentifiedImageError: if the file is not a supported image.
+    """
+    try:
+        image = PILImage.open(io.BytesIO(upload))
+    except PILImage.DecompressionBombError as e:
+        # Pillow refuses to open images far above its own pixel limit.
+        raise ImageTooLargeException(str(e)) from e
+    if image.width * image.height > max_pixels:
+        raise ImageTooLargeException(
+            f"Image has {image.width}x{image.height} pixels, "
+            f"at most {max_pixels} are allowed."
+        )
+    # Decodes at 1/2, 1/4 or 1/8 scale as long as the result still covers SIZE.
+    image.draft(None, fit_size(image.size))
+    return process_image(image)
\ No newline at end of file
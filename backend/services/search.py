@@ -0,0 +1,145 @@
+import re
+from collections import Counter
+
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+
+TITLE_WEIGHT = 5
+INGREDIENT_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+_VOWELS = "aeiouyäöü"
+_S_ENDINGS = "bdfghklmnrt"
+_ST_ENDINGS = "bdfghklmnt"
+
+STOPWORDS = frozenset(
+    "aber als am an auf aus bei bis das dem den der des die ein eine einem einen "
+    "einer eines es für im in ist mit nach oder ohne so über um und vom von vor "
+    "zu zum zur".split()
+)
+
+
+def _regions(word: str) -> tuple[int, int]:
+    """Compute the start of the snowball regions R1 and R2."""
+
+    def region_after(start: int) -> int:
+        for i in range(start + 1, len(word)):
+            if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+                return i + 1
+        return len(word)
+
+    r1 = region_after(0)
+    r2 = region_after(r1)
+    return max(r1, 3), r2
+
+
+def stem(word: str) -> str:
+    """Reduce a lowercase German word to its stem (snowball German stemmer)."""
+    word = word.replace("ß", "ss")
+
+    # Mark u and y between vowels as consonants.
+    letters = list(word)
+    for i in range(1, len(letters) - 1):
+        if (
+            letters[i] in "uy"
+            and letters[i - 1] in _VOWELS
+            and letters[i + 1] in _VOWELS
+        ):
+            letters[i] = letters[i].upper()
+    word = "".join(letters)
+
+    r1, r2 = _regions(word)
+
+    # Step 1
+    for suffix in ("ern", "em", "er", "en", "es", "e", "s"):
+        if not word.endswith(suffix):
+            continue
+        if len(word) - len(suffix) >= r1:
+            if suffix == "s":
+                if len(word) > 1 and word[-2] in _S_ENDINGS:
+                    word = word[:-1]
+            else:
+                word = word[: -len(suffix)]
+                if suffix in ("en", "es", "e") and word.endswith("niss"):
+                    word = word[:-1]
+        break
+
+    # Step 2
+    for suffix in ("est", "en", "er", "st"):
+        if not word.endswith(suffix):
+            continue
+        if len(word) - len(suffix) >= r1:
+            if suffix == "st":
+                if len(word) > 5 and word[-3] in _ST_ENDINGS:
+                    word = word[:-2]
+            else:
+                word = word[: -len(suffix)]
+        break
+
+    # Step 3
+    for suffix in ("heit", "isch", "keit", "lich", "end", "ung", "ig", "ik"):
+        if not word.endswith(suffix):
+            continue
+        start = len(word) - len(suffix)
+        if start < r2:
+            break
+        if suffix in ("end", "ung"):
+            word = word[:start]
+            if word.endswith("ig") and len(word) - 2 >= r2 and word[-3:-2] != "e":
+                word = word[:-2]
+        elif suffix in ("ig", "ik", "isch"):
+            if word[start - 1 : start] != "e":
+                word = word[:start]
+        elif suffix in ("lich", "heit"):
+            word = word[:start]
+            if word.endswith(("er", "en")) and len(word) - 2 >= r1:
+                word = word[:-2]
+        elif suffix == "keit":
+            word = word[:start]
+            if word.endswith("lich") and len(word) - 4 >= r2:
+                word = word[:-4]
+            elif word.endswith("ig") and len(word) - 2 >= r2:
+                word = word[:-2]
+        break
+
+    return (word.lower().replace("ä", "a").replace("ö", "o").replace("ü", "u"))[
+        :MAX_TERM_LENGTH
+    ]
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Split a text into stemmed search terms, dropping stopwords."""
+    if not text:
+        return []
+    return [
+        stem(token)
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def build_terms(
+    title: str | None, description: str | None, ingredients: list[str]
+) -> dict[str, int]:
+    """
+    Build the weighted index terms of a recipe.
+
+    Returns:
+        A mapping of terms to their weight within the recipe.
+    """
+    terms = Counter()
+    for term in tokenize(title):
+        terms[term] += TITLE_WEIGHT
+    for ingredient in ingredients:
+        for term in tokenize(ingredient):
+            terms[term] += INGREDIENT_WEIGHT
+    for term in tokenize(description):
+        terms[term] += DESCRIPTION_WEIGHT
+    return dict(terms)
+
+
+def query_terms(search_string: str | None) -> list[str]:
+    """Get the distinct search terms of a user query in the order they were typed."""
+    return list(dict.fromkeys(tokenize(search_string)))[:MAX_QUERY_TERMS]
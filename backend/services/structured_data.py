@@ -0,0 +1,286 @@
+import json
+import re
+
+from bs4 import BeautifulSoup
+from models.recipe import CategoryEnum, Ingredient, LLMRecipe, RecipeStep, UnitEnum
+
+# Unit words of German recipe sites, lowercase and without a trailing dot.
+UNITS = {
+    "g": (UnitEnum.G, 1),
+    "gr": (UnitEnum.G, 1),
+    "gramm": (UnitEnum.G, 1),
+    "kg": (UnitEnum.KG, 1),
+    "kilogramm": (UnitEnum.KG, 1),
+    "ml": (UnitEnum.ML, 1),
+    "milliliter": (UnitEnum.ML, 1),
+    "cl": (UnitEnum.ML, 10),
+    "dl": (UnitEnum.ML, 100),
+    "l": (UnitEnum.L, 1),
+    "liter": (UnitEnum.L, 1),
+    "el": (UnitEnum.TBSP, 1),
+    "essl": (UnitEnum.TBSP, 1),
+    "esslöffel": (UnitEnum.TBSP, 1),
+    "tl": (UnitEnum.TSP, 1),
+    "teel": (UnitEnum.TSP, 1),
+    "teelöffel": (UnitEnum.TSP, 1),
+    "stück": (UnitEnum.PCS, 1),
+    "stk": (UnitEnum.PCS, 1),
+    "st": (UnitEnum.PCS, 1),
+}
+
+# Words in the category or keywords of a recipe that select a category.
+CATEGORIES = {
+    "hauptgericht": CategoryEnum.MAIN,
+    "hauptspeise": CategoryEnum.MAIN,
+    "beilage": CategoryEnum.SIDE,
+    "brot": CategoryEnum.BREAD,
+    "brötchen": CategoryEnum.BREAD,
+    "sauce": CategoryEnum.SAUCE,
+    "soße": CategoryEnum.SAUCE,
+    "dip": CategoryEnum.SAUCE,
+    "vegetarisch": CategoryEnum.VEGETARIAN,
+    "vegan": CategoryEnum.VEGAN,
+    "getränk": CategoryEnum.DRINK,
+    "getränke": CategoryEnum.DRINK,
+    "gebäck": CategoryEnum.BAKED,
+    "kuchen": CategoryEnum.BAKED,
+    "asiatisch": CategoryEnum.ASIAN,
+    "asia": CategoryEnum.ASIAN,
+}
+
+# The fields of a schema.org Recipe that are mapped to a recipe.
+RECIPE_FIELDS = (
+    "name",
+    "description",
+    "recipeYield",
+    "totalTime",
+    "prepTime",
+    "cookTime",
+    "recipeIngredient",
+    "recipeInstructions",
+    "recipeCategory",
+    "recipeCuisine",
+    "keywords",
+    "suitableForDiet",
+    "inLanguage",
+)
+
+FRACTIONS = {"½": 0.5, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 0.25, "¾": 0.75, "⅛": 0.125}
+_NUMBER = r"\d+(?:[.,]\d+)?(?:/\d+)?"
+_AMOUNT = re.compile(
+    rf"^\s*(?P<amount>(?:{_NUMBER})?\s*[{''.join(FRACTIONS)}]?)"
+    rf"(?:\s*[-–]\s*(?:{_NUMBER}))?\s+(?P<rest>.+)$"
+)
+_DURATION = re.compile(
+    r"^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:\d+S)?)?$"
+)
+
+
+def _is_recipe(item) -> bool:
+    types = item.get("@type") if isinstance(item, dict) else None
+    return "Recipe" in (types if isinstance(types, list) else [types])
+
+
+def _find_in_json_ld(data):
+    if isinstance(data, list):
+        return next(filter(None, map(_find_in_json_ld, data)), None)
+    if not isinstance(data, dict):
+        return None
+    if _is_recipe(data):
+        return data
+    return _find_in_json_ld(data.get("@graph", []))
+
+
+def _microdata(scope) -> dict:
+    # Collects the properties of an itemscope, without those of nested scopes.
+    data = {}
+    for element in scope.find_all(attrs={"itemprop": True}):
+        if element.find_parent(attrs={"itemscope": True}) is not scope:
+            continue
+        if element.has_attr("itemscope"):
+            value = _microdata(element)
+        else:
+            value = element.get("content") or element.get_text(" ", strip=True)
+        for name in element["itemprop"].split():
+            data.setdefault(name, []).append(value)
+    return {
+        name: values[0] if len(values) == 1 and name != "recipeIngredient" else values
+        for name, values in data.items()
+    }
+
+
+def _language(value) -> str | None:
+    # inLanguage is a language code, or a schema.org Language with a name.
+    if isinstance(value, str):
+        return value or None
+    if isinstance(value, dict):
+        return _language(value.get("alternateName")) or _language(value.get("name"))
+    if isinstance(value, list):
+        return next(filter(None, map(_language, value)), None)
+    return None
+
+
+def find_recipe_data(html: str) -> tuple[dict | None, str | None]:
+    """
+    Find the schema.org Recipe markup of a page, as JSON-LD or microdata.
+
+    Returns:
+        The recipe data and the language of the page, if given.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    language = soup.html.get("lang") if soup.html else None
+
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            recipe = _find_in_json_ld(json.loads(script.string or ""))
+        except json.JSONDecodeError:
+            continue
+        if recipe:
+            return recipe, _language(recipe.get("inLanguage")) or language
+
+    scope = soup.find(itemtype=re.compile(r"schema\.org/Recipe$"))
+    if scope is not None:
+        recipe = _microdata(scope)
+        if "ingredients" in recipe and "recipeIngredient" not in recipe:
+            recipe["recipeIngredient"] = recipe.pop("ingredients")
+        return recipe, _language(recipe.get("inLanguage")) or language
+    return None, language
+
+
+def compact(recipe: dict) -> dict:
+    """Keep only the fields of the recipe data that a recipe is made from."""
+    return {field: recipe[field] for field in RECIPE_FIELDS if recipe.get(field)}
+
+
+def _text(value) -> str:
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    return BeautifulSoup(str(value or ""), "html.parser").get_text(" ", strip=True)
+
+
+def _parse_amount(amount: str) -> float:
+    amount = amount.replace(" ", "").replace(",", ".")
+    fraction = 0.0
+    if amount and amount[-1] in FRACTIONS:
+        amount, fraction = amount[:-1], FRACTIONS[amount[-1]]
+    if "/" in amount:
+        numerator, denominator = amount.split("/")
+        return float(numerator) / float(denominator) + fraction
+    return (float(amount) if amount else 0.0) + fraction
+
+
+def parse_ingredient(line: str) -> Ingredient:
+    """
+    Parse an ingredient line such as "200 g Mehl" or "1 ½ EL Öl". Lines
+    without an amount get the amount 0, unit words without a matching
+    UnitEnum stay part of the name.
+    """
+    line = _text(line)
+    match = _AMOUNT.match(line)
+    if not match or not match["amount"].strip():
+        return Ingredient(name=line, unit=UnitEnum.PCS, amount=0)
+
+    amount = _parse_amount(match["amount"])
+    rest = match["rest"]
+    unit_word, _, name = rest.partition(" ")
+    unit = UNITS.get(unit_word.lower().rstrip("."))
+    if unit is None or not name:
+        return Ingredient(name=rest, unit=UnitEnum.PCS, amount=amount)
+    return Ingredient(name=name, unit=unit[0], amount=amount * unit[1])
+
+
+def _ingredients(value) -> list[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [line for line in value if isinstance(line, str)]
+    return []
+
+
+def _parse_minutes(duration) -> int | None:
+    match = _DURATION.match(_text(duration)) if duration else None
+    if not match:
+        return None
+    days, hours, minutes = (int(match[name] or 0) for name in match.groupdict())
+    return (days * 24 + hours) * 60 + minutes
+
+
+def _parse_portions(recipe_yield) -> int | None:
+    values = recipe_yield if isinstance(recipe_yield, list) else [recipe_yield]
+    for value in values:
+        match = re.search(r"\d+", _text(value))
+        if match:
+            return int(match[0])
+    return None
+
+
+def _instructions(instructions) -> list[str]:
+    if isinstance(instructions, str):
+        return [line.strip() for line in _text(instructions).splitlines()]
+    if isinstance(instructions, dict):
+        if "itemListElement" in instructions:
+            return _instructions(instructions["itemListElement"])
+        return [_text(instructions.get("text") or instructions.get("name"))]
+    if isinstance(instructions, list):
+        return [step for item in instructions for step in _instructions(item)]
+    return []
+
+
+def _categories(recipe: dict) -> list[CategoryEnum]:
+    words = []
+    for field in ("recipeCategory", "recipeCuisine", "keywords", "suitableForDiet"):
+        value = recipe.get(field) or []
+        for item in value if isinstance(value, list) else [value]:
+            words += re.split(r"[,;]", _text(item))
+    categories = {CATEGORIES.get(word.strip().lower()) for word in words}
+    categories.discard(None)
+    return sorted(categories)
+
+
+def to_llm_recipe(recipe: dict, language: str | None) -> LLMRecipe | None:
+    """
+    Map schema.org Recipe data to a recipe without the LLM.
+
+    Returns:
+        The recipe, or None if the data is not German, misses required fields
+        or has an unexpected shape, which then need the LLM.
+    """
+    if not (_language(language) or "").lower().startswith(("de", "german")):
+        return None
+    title = _text(recipe.get("name"))
+    ingredients = _ingredients(recipe.get("recipeIngredient"))
+    steps = [step for step in _instructions(recipe.get("recipeInstructions")) if step]
+    cooking_time = _parse_minutes(recipe.get("totalTime"))
+    if cooking_time is None:
+        prep, cook = (
+            _parse_minutes(recipe.get(field)) for field in ("prepTime", "cookTime")
+        )
+        if prep is not None or cook is not None:
+            cooking_time = (prep or 0) + (cook or 0)
+    portions = _parse_portions(recipe.get("recipeYield"))
+    if (
+        not title
+        or not ingredients
+        or not steps
+        or cooking_time is None
+        or not portions
+    ):
+        return None
+
+    try:
+        return LLMRecipe(
+            title=title,
+            description=_text(recipe.get("description")) or None,
+            portions=portions,
+            ingredients=[parse_ingredient(line) for line in ingredients],
+            cooking_time=cooking_time,
+            steps=[
+                RecipeStep(order_id=order_id, step=step)
+                for order_id, step in enumerate(steps)
+            ],
+            categories=_categories(recipe),
+            is_a_recipe=True,
+        )
+    except (ValueError, ZeroDivisionError):
+        # Includes pydantic's ValidationError.
+        return None
@@ -0,0 +1,12 @@
+import json
+import os
+import tempfile
+
+# The modules load assets/config.json from the working directory when they are
+# imported. The tests run in a directory with an empty config, so that every
+# setting has its default.
+_directory = tempfile.mkdtemp(prefix="fast_kitchen_tests_")
+os.makedirs(os.path.join(_directory, "assets"))
+with open(os.path.join(_directory, "assets", "config.json"), "w") as f:
+    json.dump({}, f)
+os.chdir(_directory)
@@ -0,0 +1,66 @@
+import pytest
+from services.content_reduction import CHARS_PER_TOKEN, reduce_content
+
+RECIPE = (
+    "<h1>Tomatensuppe</h1><ul><li>500 g Tomaten</li><li>1 EL Öl</li></ul>"
+    "<p>Die Tomaten kochen und pürieren.</p>"
+)
+NAVIGATION = '<nav><a href="/">Startseite</a><a href="/rezepte">Rezepte</a></nav>'
+SIDEBAR = '<div class="sidebar"><p>Beliebte Rezepte der Woche</p></div>'
+COMMENTS = '<div id="comments"><p>Sehr lecker, danke!</p></div>'
+
+
+def test_keeps_recipe_and_drops_boilerplate():
+    text = reduce_content(
+        f"<html><body>{NAVIGATION}<article>{RECIPE}{COMMENTS}</article>"
+        f"{SIDEBAR}</body></html>"
+    )
+    assert "Tomatensuppe" in text and "500 g Tomaten" in text
+    assert "Startseite" not in text
+    assert "Beliebte Rezepte" not in text
+    assert "Sehr lecker" not in text
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        # WordPress marks the body with the features of the theme.
+        f'<html><body class="page has-main-navigation">{RECIPE}</body></html>',
+        f'<html><body><div class="site layout-with-sidebar">{RECIPE}'
+        f"{SIDEBAR}</div></body></html>",
+        f'<html><body><div id="main-nav-wrapper"><main>{RECIPE}</main>'
+        f"</div></body></html>",
+    ],
+)
+def test_keeps_page_wrappers_with_boilerplate_names(html):
+    text = reduce_content(html)
+    assert "Tomatensuppe" in text and "Die Tomaten kochen" in text
+
+
+def test_keeps_page_text_if_reduction_is_too_small():
+    # The only recipe text is in a block with a boilerplate name.
+    steps = "".join(f"<p>Schritt {i}: Tomaten rühren.</p>" for i in range(20))
+    text = reduce_content(
+        "<html><body><div><p>Ein Absatz.</p></div>"
+        f'<div class="promo-box">{RECIPE}{steps}</div>'
+        f'<div class="related">{steps}</div></body></html>'
+    )
+    assert "Tomatensuppe" in text and "Schritt 19" in text
+
+
+def test_truncates_to_token_budget():
+    lines = "".join(f"<p>Schritt {i}: Tomaten rühren.</p>" for i in range(200))
+    text = reduce_content(f"<html><body><article>{lines}</article></body></html>", 50)
+    assert 0 < len(text) <= 50 * CHARS_PER_TOKEN
+    # Cut at the end of a line.
+    assert text.endswith("Tomaten rühren.")
+
+
+def test_keeps_short_text_whole():
+    text = reduce_content(f"<html><body><article>{RECIPE}</article></body></html>")
+    assert text.splitlines() == [
+        "Tomatensuppe",
+        "500 g Tomaten",
+        "1 EL Öl",
+        "Die Tomaten kochen und pürieren.",
+    ]
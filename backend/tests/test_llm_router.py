@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from clients.llm_router import ModelRouter
+
+
+def fake_models(**models: tuple[float, bool]):
+    """
+    Fake async model calls by name, each with a latency in seconds and whether
+    it fails. Returns the call and the list of the names of called models.
+    """
+    called = []
+
+    async def call(model: str) -> str:
+        called.append(model)
+        latency, fails = models[model]
+        await asyncio.sleep(latency)
+        if fails:
+            raise RuntimeError(f"{model} failed")
+        return model
+
+    return call, called
+
+
+def run(router: ModelRouter, call, **kwargs):
+    return asyncio.run(router.call(call, **kwargs))
+
+
+def test_denied_hedge_keeps_fallback():
+    call, called = fake_models(a=(0.05, True), b=(0, False))
+    router = ModelRouter(["a", "b"], timeout=1, hedge_delay=0.01)
+    assert run(router, call, can_hedge=lambda: False) == "b"
+    assert called == ["a", "b"]
+    assert router.hedges.value() == 0
+    assert router.fallbacks.value() == 1
+
+
+def test_granted_hedge():
+    call, called = fake_models(a=(0.5, False), b=(0, False))
+    router = ModelRouter(["a", "b"], timeout=1, hedge_delay=0.01)
+    assert run(router, call, can_hedge=lambda: True) == "b"
+    assert called == ["a", "b"]
+    assert router.hedges.value() == 1
+
+
+def test_all_models_fail():
+    call, called = fake_models(a=(0, True), b=(0, True))
+    router = ModelRouter(["a", "b"], timeout=1, hedge_delay=0.01)
+    with pytest.raises(RuntimeError, match="b failed"):
+        run(router, call, can_hedge=lambda: False)
+    assert called == ["a", "b"]
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+from models.recipe import UnitEnum
+from services.structured_data import find_recipe_data, to_llm_recipe
+
+RECIPE = {
+    "@type": "Recipe",
+    "name": "Tomatensuppe",
+    "recipeYield": "2 Portionen",
+    "totalTime": "PT30M",
+    "recipeIngredient": ["500 g Tomaten", "1 EL Öl"],
+    "recipeInstructions": [{"@type": "HowToStep", "text": "Alles kochen."}],
+}
+
+
+def page(recipe: dict, lang: str = "de") -> str:
+    return (
+        f'<html lang="{lang}"><head><script type="application/ld+json">'
+        f"{json.dumps(recipe)}</script></head></html>"
+    )
+
+
+def test_maps_recipe():
+    recipe = to_llm_recipe(*find_recipe_data(page(RECIPE)))
+    assert recipe.title == "Tomatensuppe"
+    assert recipe.portions == 2
+    assert recipe.cooking_time == 30
+    assert [(i.name, i.unit, i.amount) for i in recipe.ingredients] == [
+        ("Tomaten", UnitEnum.G, 500),
+        ("Öl", UnitEnum.TBSP, 1),
+    ]
+
+
+def test_single_ingredient_string():
+    recipe = to_llm_recipe({**RECIPE, "recipeIngredient": "500 g Tomaten"}, "de")
+    assert [i.name for i in recipe.ingredients] == ["Tomaten"]
+
+
+def test_drops_ingredients_that_are_not_strings():
+    recipe = to_llm_recipe(
+        {**RECIPE, "recipeIngredient": ["500 g Tomaten", {"name": "Salz"}, None]},
+        "de",
+    )
+    assert [i.name for i in recipe.ingredients] == ["Tomaten"]
+
+
+@pytest.mark.parametrize("ingredients", [{"name": "Salz"}, [{"name": "Salz"}], 3])
+def test_ingredients_of_unexpected_shape(ingredients):
+    assert to_llm_recipe({**RECIPE, "recipeIngredient": ingredients}, "de") is None
+
+
+@pytest.mark.parametrize(
+    "in_language, language",
+    [
+        ("de-DE", "de-DE"),
+        ({"@type": "Language", "name": "Deutsch", "alternateName": "de"}, "de"),
+        ({"@type": "Language", "name": "German"}, "German"),
+        ([{"name": "Deutsch"}, "en"], "Deutsch"),
+        ({"@type": "Language"}, "en"),
+        (42, "en"),
+    ],
+)
+def test_in_language(in_language, language):
+    _, found = find_recipe_data(page({**RECIPE, "inLanguage": in_language}, "en"))
+    assert found == language
+
+
+@pytest.mark.parametrize(
+    "in_language", [{"name": "Deutsch"}, {"alternateName": "de"}, ["German"]]
+)
+def test_language_object_selects_german(in_language):
+    assert to_llm_recipe(RECIPE, in_language) is not None
+
+
+def test_other_language():
+    assert to_llm_recipe(RECIPE, "en") is None
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [
+        ("recipeIngredient", ["1/0 kg Mehl"]),
+        ("recipeYield", "0"),
+        ("name", None),
+    ],
+)
+def test_unexpected_values(field, value):
+    assert to_llm_recipe({**RECIPE, field: value}, "de") is None
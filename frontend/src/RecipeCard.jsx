@@ -10,7 +10,11 @@ function RecipeCard({ recipe }) {
         <div className="recipe-card">
             <div className="image-container">
                 {recipe.cover_image !== null ? (
-                    <img src={API_BASE + "image/" + recipe.cover_image} alt={recipe.name} />
+                    <img
+                        src={API_BASE + "image/" + recipe.cover_image + "?width=360"}
+                        srcSet={API_BASE + "image/" + recipe.cover_image + "?width=360 1x, " + API_BASE + "image/" + recipe.cover_image + " 2x"}
+                        alt={recipe.name}
+                    />
                 ) : (
                     <div className="missingImage"><RamenDiningOutlinedIcon /></div>
                 )}
@@ -50,13 +50,66 @@ const deleteImage = async (id, token) => {
     }
 }
 
-const imagesList = (images, imgClass, deleteStepImageOnChange, iconClass = "deleteIcon") => {
+// Progress messages for the events of an extraction job.
+const EXTRACTION_PROGRESS = {
+    fetched: () => 'Page loaded, looking for the recipe…',
+    cleaned: () => 'Reading the recipe…',
+    title: data => 'Found "' + data.title + '"',
+    ingredients: data => data.ingredients.length + ' ingredients found',
+    steps: data => data.steps.length + ' steps found, saving…',
+};
+
+// Follows the progress events of an extraction job until it is saved or failed and returns the final job.
+const waitForExtraction = async (job, token, onProgress) => {
+    const response = await fetch(API_BASE + 'parse-jobs/' + job.id_ + '/events', {
+        headers: {
+            'Authorization': 'Bearer ' + token,
+        },
+    });
+    if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.detail);
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            throw new Error('The extraction progress stream ended early');
+        }
+        buffer += value;
+        const messages = buffer.split('\n\n');
+        buffer = messages.pop();
+        for (const message of messages) {
+            let event = null;
+            let data = null;
+            for (const line of message.split('\n')) {
+                if (line.startsWith('event: ')) event = line.slice('event: '.length);
+                if (line.startsWith('data: ')) data = JSON.parse(line.slice('data: '.length));
+            }
+            if (event === 'saved') {
+                reader.cancel();
+                return { ...job, status: 'done', recipe_id: data.recipe_id };
+            }
+            if (event === 'failed') {
+                reader.cancel();
+                return { ...job, status: 'failed', error: data.error };
+            }
+            if (event in EXTRACTION_PROGRESS) {
+                onProgress(EXTRACTION_PROGRESS[event](data));
+            }
+        }
+    }
+}
+
+const imagesList = (images, imgClass, deleteStepImageOnChange, iconClass = "deleteIcon", width = null) => {
     return (
         <Stack direction={'row'} spacing={2} className='imageList'>
             {images.map((image) => (
                 <div key={image}>
                     <div className='uploadImgContainer'>
-                        <img className={imgClass} src={API_BASE + "image/" + image} alt={image} />
+                        <img className={imgClass} src={API_BASE + "image/" + image + (width ? "?width=" + width : "")} alt={image} />
                         <button type="button" onClick={() => deleteStepImageOnChange(image)} className={iconClass}>
                             <RemoveCircleOutlineOutlinedIcon />
                         </button>
@@ -260,7 +313,7 @@ function Step({ index, step, onChangeDesciption, onDelete, onUploadImage, onDele
                             {step.description !== "" && <button type='button' onClick={onDelete} className='clearBtn'><RemoveCircleOutlineOutlinedIcon /></button>}
                         </Stack>
                     </Stack>
-                    {step.images.length > 0 && imagesList(step.images, "stepImg", onDeleteImage, "deleteIconStep")}
+                    {step.images.length > 0 && imagesList(step.images, "stepImg", onDeleteImage, "deleteIconStep", 160)}
                 </Stack>
             </Stack>
         </div>
@@ -355,6 +408,7 @@ function RecipeEditor() {
     const [importUrl, setImportUrl] = useState("");
     const [importText, setImportText] = useState("");
     const [importing, setImporting] = useState(false);
+    const [importProgress, setImportProgress] = useState("");
     const [inputMode, setInputMode] = useState(0); // 0 = manual, 1 = from text
 
     useEffect(() => {
@@ -528,6 +582,7 @@ function RecipeEditor() {
         }
 
         setImporting(true);
+        setImportProgress("");
         setAlertMessage("");
 
         try {
@@ -541,8 +596,13 @@ function RecipeEditor() {
             });
 
             if (response.ok) {
-                const data = await response.json();
-                navigate('/edit/' + data.id_);
+                const job = await waitForExtraction(await response.json(), token, setImportProgress);
+                if (job.status === 'done') {
+                    navigate('/edit/' + job.recipe_id);
+                } else {
+                    setAlertMessage('Import failed: ' + job.error);
+                    setAlertSeverity("error");
+                }
             } else {
                 const error = await response.json();
                 setAlertMessage('Import failed: ' + error.detail);
@@ -565,6 +625,7 @@ function RecipeEditor() {
         }
 
         setImporting(true);
+        setImportProgress("");
         setAlertMessage("");
 
         try {
@@ -578,9 +639,14 @@ function RecipeEditor() {
             });
 
             if (response.ok) {
-                const data = await response.json();
-                setInputMode(0);
-                navigate('/edit/' + data.id_);
+                const job = await waitForExtraction(await response.json(), token, setImportProgress);
+                if (job.status === 'done') {
+                    setInputMode(0);
+                    navigate('/edit/' + job.recipe_id);
+                } else {
+                    setAlertMessage('Parsing failed: ' + job.error);
+                    setAlertSeverity("error");
+                }
             } else {
                 const error = await response.json();
                 setAlertMessage('Parsing failed: ' + error.detail);
@@ -786,7 +852,7 @@ function RecipeEditor() {
                         </p>
                         <p className="loading-hint">
                             {importing
-                                ? 'Parsing your recipe — this may take a moment'
+                                ? importProgress || 'Parsing your recipe — this may take a moment'
                                 : storing
                                     ? 'Almost there…'
                                     : 'Fetching recipe details…'}